@@ -0,0 +1,242 @@
+# Copyright (c) 2023 GeekerBear
+# Rotary encoder decoder benchmarks
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+解码性能基准测试,无需硬件。在仓库根目录运行:
+    micropython bench_rotary.py     (unix 端口或开发板)
+    python3 bench_rotary.py         (CPython,使用 host/ 下的桩模块)
+
+报告每秒边沿数、监听器调用开销以及每个边沿的堆分配字节数。
+CPython 的整数本身就在堆上分配,因此只在 MicroPython 上统计分配。
+延迟测试报告从中断记录事件到监听器收到事件的 p50/p99 延迟
+"""
+
+import sys
+sys.path.append('lib')
+if sys.implementation.name != 'micropython':
+    sys.path.insert(0, 'host')
+
+import gc
+import utime
+import rotary
+from rotary_sim import SimRotary, Quadrature
+
+# 顺时针一个完整周期的 CLK/DT 序列
+_CW = (0b10, 0b00, 0b01, 0b11)
+_EDGES = 20000
+
+# (half_step, quarter_step)
+_DECODE_MODES = ((False, False), (True, False), (False, True))
+
+_RANGE_MODES = (
+    ('unbounded', SimRotary.RANGE_UNBOUNDED),
+    ('wrap', SimRotary.RANGE_WRAP),
+    ('bounded', SimRotary.RANGE_BOUNDED))
+
+
+def _report(name, edges, us):
+    print('%-28s %8d edges/s' % (name, edges * 1000000 // max(us, 1)))
+
+
+def _mem_alloc():
+    if hasattr(gc, 'mem_alloc'):
+        return gc.mem_alloc()
+    return None
+
+
+def _edges(half_step, count, quarter_step=False):
+    # 来回旋转,使有界模式也不会一直停在边界上
+    q = Quadrature(half_step=half_step, quarter_step=quarter_step)
+    per_detent = 1 if quarter_step else 2 if half_step else 4
+    edges = []
+    while len(edges) < count:
+        edges.extend(q.turn(50 // per_detent * per_detent))
+        edges.extend(q.turn(-(50 // per_detent * per_detent)))
+    return [(clk, dt) for _, clk, dt in edges[:count]]
+
+
+def _run(r, edges):
+    edge = r.edge
+    t0 = utime.ticks_us()
+    for clk, dt in edges:
+        edge(clk, dt)
+    return utime.ticks_diff(utime.ticks_us(), t0)
+
+
+def _mode_name(half_step, quarter_step):
+    return 'quarter' if quarter_step else 'half' if half_step else 'full'
+
+
+def check_tables():
+    """逐项核对展平的状态表与列表参考实现,不一致时抛出 AssertionError"""
+    for half_step, quarter_step in _DECODE_MODES:
+        states = 4 if quarter_step else 8
+        for invert in (False, True):
+            table = rotary._select_table(half_step, invert, quarter_step)
+            for state in range(states):
+                for pins in range(4):
+                    expected = rotary._next_state_ref(state, pins, half_step, invert, quarter_step)
+                    assert rotary._next_state(table, state, pins) == expected, (
+                        _mode_name(half_step, quarter_step), invert, state, pins)
+    print('%-28s %8s' % ('tables', 'ok'))
+
+
+def bench_kernel(half_step, invert, quarter_step=False):
+    """对比 viper 解码内核与纯 Python 参考实现"""
+    table = rotary._select_table(half_step, invert, quarter_step)
+    next_state = rotary._next_state
+    next_state_ref = rotary._next_state_ref
+    tag = '%s%s' % (_mode_name(half_step, quarter_step), ' invert' if invert else '')
+
+    state = 0
+    t0 = utime.ticks_us()
+    for i in range(_EDGES):
+        state = next_state_ref(state, _CW[i & 3], half_step, invert, quarter_step)
+    _report('reference ' + tag, _EDGES, utime.ticks_diff(utime.ticks_us(), t0))
+
+    state = 0
+    t0 = utime.ticks_us()
+    for i in range(_EDGES):
+        state = next_state(table, state, _CW[i & 3])
+    _report('kernel ' + tag, _EDGES, utime.ticks_diff(utime.ticks_us(), t0))
+
+
+def bench_decode(half_step, mode_name, range_mode, edges, quarter_step=False):
+    """完整的边沿处理路径(无监听器)"""
+    r = SimRotary(max_val=100, range_mode=range_mode, half_step=half_step, event_queue=0,
+                  quarter_step=quarter_step)
+    tag = '%s %s' % (_mode_name(half_step, quarter_step), mode_name)
+    _report('decode ' + tag, len(edges), _run(r, edges))
+
+    r = SimRotary(max_val=100, range_mode=range_mode, half_step=half_step, event_queue=0,
+                  quarter_step=quarter_step)
+    gc.collect()
+    before = _mem_alloc()
+    if before is not None:
+        gc.disable()
+        _run(r, edges)
+        used = _mem_alloc() - before
+        gc.enable()
+        print('%-28s %8.2f bytes/edge' % ('alloc ' + tag, used / len(edges)))
+
+
+def bench_dispatch(event_queue, edges):
+    """监听器调用开销:有无监听器的耗时差除以事件数"""
+    def listener(rotary_id, value, direction):
+        pass
+
+    r = SimRotary(event_queue=event_queue)
+    base = _run(r, edges)
+    r = SimRotary(event_queue=event_queue)
+    r.add_listener(listener)
+    loaded = _run(r, edges)
+    events = abs(r.value()) or len(edges) // 4
+    print('%-28s %8.2f us/event' % ('dispatch queue=%d' % event_queue, (loaded - base) / events))
+
+
+class _LoadedScheduler(object):
+    """
+    micropython.schedule 的替身: 回调先排队,主循环每完成一段工作才执行,
+    模拟主循环忙于刷新屏幕等长时间操作时调度回调被推迟
+    """
+
+    def __init__(self):
+        self.queue = []
+
+    def schedule(self, func, arg):
+        self.queue.append((func, arg))
+
+    def run(self):
+        queue = self.queue
+        self.queue = []
+        for func, arg in queue:
+            func(arg)
+
+
+def _percentile(values, p):
+    return values[min(len(values) - 1, len(values) * p // 100)]
+
+
+def bench_latency(load_us, edge_us=250, detents=200):
+    """
+    主循环每段工作耗时 load_us,边沿每 edge_us 到达一次(在工作期间照常进入"中断"),
+    统计事件从中断记录到监听器收到的延迟
+    """
+    delays = []
+
+    def listener(rotary_id, kind, value, delta, t_us, seq):
+        delays.append(utime.ticks_diff(utime.ticks_us(), t_us))
+
+    scheduler = _LoadedScheduler()
+    real_micropython = rotary.micropython
+    rotary.micropython = scheduler
+    try:
+        r = SimRotary()
+        r.add_event_listener(listener)
+        edges = [(clk, dt) for _, clk, dt in Quadrature().turn(detents)]
+        i = 0
+        next_edge = utime.ticks_us()
+        while i < len(edges):
+            block_end = utime.ticks_add(utime.ticks_us(), load_us)
+            while True:
+                now = utime.ticks_us()
+                if i < len(edges) and utime.ticks_diff(now, next_edge) >= 0:
+                    r.edge(*edges[i])
+                    i += 1
+                    next_edge = utime.ticks_add(next_edge, edge_us)
+                if utime.ticks_diff(now, block_end) >= 0:
+                    break
+            scheduler.run()
+        scheduler.run()
+    finally:
+        rotary.micropython = real_micropython
+
+    delays.sort()
+    print('%-28s %5d/%-5d us p50/p99, %d lost' % (
+        'latency load=%dus' % load_us, _percentile(delays, 50), _percentile(delays, 99),
+        r.stats()['overflows']))
+
+
+def bench_resync(half_step):
+    """漏边沿补偿:每 3 个边沿丢 1 个,比较补偿前后的计数误差"""
+    for rate_hz in (100, 1000, 5000, 20000):
+        errors = []
+        for resync in (False, True):
+            r = SimRotary(half_step=half_step, resync=resync)
+            q = Quadrature(half_step=half_step)
+            r.feed(q.turn(100, rate_hz=rate_hz, drop=3))
+            errors.append(100 - abs(r.value()))
+        print('%-28s %8d lost -> %d' % ('resync %s %dHz' % ('half' if half_step else 'full', rate_hz),
+                                         errors[0], errors[1]))
+
+
+def main():
+    check_tables()
+
+    for half_step, quarter_step in _DECODE_MODES:
+        for invert in (False, True):
+            bench_kernel(half_step, invert, quarter_step)
+
+    for half_step, quarter_step in _DECODE_MODES:
+        edges = _edges(half_step, _EDGES, quarter_step)
+        for mode_name, range_mode in _RANGE_MODES:
+            bench_decode(half_step, mode_name, range_mode, edges, quarter_step)
+
+    edges = [(clk, dt) for _, clk, dt in Quadrature().turn(_EDGES // 4)]
+    for event_queue in (0, 8):
+        bench_dispatch(event_queue, edges)
+
+    # 延迟测试需要真实时钟
+    if hasattr(utime, 'set_ticks_us'):
+        utime.set_ticks_us(None)
+    for load_us in (0, 1000, 5000, 20000):
+        bench_latency(load_us)
+
+    for half_step in (False, True):
+        bench_resync(half_step)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# Copyright (c) 2023 GeekerBear
+# Precompile the rotary encoder modules to .mpy
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+用 mpy-cross 把 lib/ 下的模块预编译为 .mpy,开发板 import 时不再编译源码。
+在仓库根目录用 CPython 运行(需要 pip install mpy-cross,版本与固件一致):
+    python3 build_mpy.py esp8266          # 输出到 build/esp8266/
+    python3 build_mpy.py rp2 -o /tmp/mpy
+
+把输出目录中的 .mpy 复制到开发板的 /lib。解码内核 rotary_kernel 使用 viper,
+必须按端口指定 -march,因此需要给出端口名;架构不符的 rotary_kernel.mpy
+导入失败时 rotary 退回纯 Python 解码
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+# 端口对应的 mpy-cross -march
+_MARCH = {
+    'esp8266': 'xtensa',
+    'esp32': 'xtensawin',
+    'rp2': 'armv6m',
+    'pyboard': 'armv7emsp',
+    'unix': 'x64',
+}
+
+# 仅供主机使用的模块不需要编译
+_SKIP = ('rotary_sim.py',)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('port', choices=sorted(_MARCH))
+    parser.add_argument('-o', '--output', help='output directory, default build/<port>')
+    parser.add_argument('--mpy-cross', default='mpy-cross', help='mpy-cross executable')
+    args = parser.parse_args()
+
+    output = args.output or os.path.join('build', args.port)
+    os.makedirs(output, exist_ok=True)
+    for name in sorted(os.listdir('lib')):
+        if not name.endswith('.py') or name in _SKIP:
+            continue
+        target = os.path.join(output, name[:-3] + '.mpy')
+        cmd = [args.mpy_cross, '-O1', '-march=' + _MARCH[args.port],
+               '-s', name, '-o', target, os.path.join('lib', name)]
+        print(' '.join(cmd))
+        if subprocess.call(cmd):
+            sys.exit('mpy-cross failed on %s' % name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# Copyright (c) 2023 GeekerBear
+# Import-time and RAM footprint measurement
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+测量 import 耗时、import 后的堆占用和每个编码器实例的堆占用。在仓库根目录运行:
+    micropython footprint_rotary.py                  (unix 端口,从源码导入)
+    python3 build_mpy.py unix
+    micropython footprint_rotary.py build/unix       (比较预编译的 .mpy)
+
+unix 端口没有 machine.Pin,实例用 SimRotary 测量,与 RotaryIRQ 相比少三个 Pin 对象。
+CPython 上只报告 import 耗时
+"""
+
+import sys
+sys.path.insert(0, sys.argv[1] if len(sys.argv) > 1 else 'lib')
+sys.path.append('lib')
+if sys.implementation.name != 'micropython':
+    sys.path.insert(0, 'host')
+
+import gc
+import utime
+
+_INSTANCES = 10
+
+
+def _mem_alloc():
+    gc.collect()
+    if hasattr(gc, 'mem_alloc'):
+        return gc.mem_alloc()
+    return None
+
+
+def _report(name, before, after, count=1):
+    if before is None:
+        print('%-28s %8s' % (name, 'n/a'))
+    else:
+        print('%-28s %8d bytes' % (name, (after - before) // count))
+
+
+def measure_import(name):
+    """导入模块,报告耗时和堆占用"""
+    before = _mem_alloc()
+    t0 = utime.ticks_us()
+    module = __import__(name)
+    us = utime.ticks_diff(utime.ticks_us(), t0)
+    print('%-28s %8d us' % ('import ' + name, us))
+    _report('heap ' + name, before, _mem_alloc())
+    return module
+
+
+def measure_instances(cls, name, **kwargs):
+    """每个实例的堆占用,取 _INSTANCES 个实例的平均值"""
+    instances = []
+    before = _mem_alloc()
+    for _ in range(_INSTANCES):
+        instances.append(cls(**kwargs))
+    _report(name, before, _mem_alloc(), _INSTANCES)
+    return instances
+
+
+def main():
+    measure_import('rotary')
+    rotary_sim = measure_import('rotary_sim')
+    SimRotary = rotary_sim.SimRotary
+
+    measure_instances(SimRotary, 'instance')
+    measure_instances(SimRotary, 'instance event_queue=0', event_queue=0)
+
+    # 第一次注册双击回调时才导入连击/长按计时
+    r = SimRotary()
+    before = _mem_alloc()
+    r.add_dbclick_listener(lambda rotary_id: None)
+    _report('first dbclick listener', before, _mem_alloc())
+
+    measure_instances(SimRotary, 'instance long_ms=500', long_ms=500)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# Copyright (c) 2023 GeekerBear
+# Host-side stand-in for the MicroPython "machine" module
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+仅用于在 CPython 上运行 lib/ 下的模块。主机上没有中断,临界区为空操作。
+Timer 运行在 utime.set_ticks_us() 的虚拟时钟上:推进时钟时,期间到期的回调按时间顺序调用,
+调用时时钟停在该截止时间;使用真实时钟时定时器不触发
+"""
+
+import utime
+
+
+def disable_irq():
+    return 0
+
+
+def enable_irq(state):
+    pass
+
+
+_active = []
+
+
+class Timer(object):
+
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs):
+        self.id = id
+        self._deadline_us = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, period=-1, callback=None, freq=-1):
+        period_us = 1000000 // freq if freq > 0 else period * 1000
+        self._mode = mode
+        self._period_us = max(1, period_us)
+        self._callback = callback
+        self._deadline_us = (utime._virtual_us or 0) + self._period_us
+        if self not in _active:
+            _active.append(self)
+
+    def deinit(self):
+        self._deadline_us = None
+        if self in _active:
+            _active.remove(self)
+
+
+def _advance(t_us):
+    """虚拟时钟推进到 t_us,依次触发期间到期的定时器"""
+    while True:
+        due = None
+        for timer in _active:
+            if timer._deadline_us <= t_us and (due is None or timer._deadline_us < due._deadline_us):
+                due = timer
+        if due is None:
+            return
+        utime._virtual_us = due._deadline_us
+        if due._mode == Timer.PERIODIC:
+            due._deadline_us += due._period_us
+        else:
+            due.deinit()
+        if due._callback is not None:
+            due._callback(due)
+
+
+def _reset():
+    """停止所有定时器(测试之间调用)"""
+    for timer in list(_active):
+        timer.deinit()
+
+
+utime._on_advance = _advance
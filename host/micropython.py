@@ -0,0 +1,29 @@
+# Copyright (c) 2023 GeekerBear
+# Host-side stand-in for the MicroPython "micropython" module
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+仅用于在 CPython 上运行 lib/ 下的模块(仿真与基准测试),不要复制到开发板
+"""
+
+
+def const(value):
+    return value
+
+
+def schedule(func, arg):
+    # 主机上没有中断上下文,直接调用
+    func(arg)
+
+
+def viper(func):
+    return func
+
+
+def native(func):
+    return func
+
+
+def alloc_emergency_exception_buf(size):
+    pass
@@ -0,0 +1,62 @@
+# Copyright (c) 2023 GeekerBear
+# Host-side decoder for RotaryTelemetry frames
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+RotaryTelemetry 帧的主机端解码器,只依赖标准库 struct,可以单独复制到 PC 上使用
+
+    decoder = FrameDecoder()
+    for rotary_id, delta, value, t, button in decoder.feed(serial.read(256)):
+        ...
+
+帧格式见 lib/rotary_telemetry.py,两边的格式必须保持一致
+"""
+
+import struct
+
+_SYNC = b'\xaa\x55'
+_RECORD = '<BhiIB'
+_RECORD_SIZE = 12
+_HEADER_SIZE = 3
+BUTTON_LEVEL = 0x01
+BUTTON_EVENT = 0x80
+
+
+class FrameDecoder(object):
+    """
+    RotaryTelemetry 帧解码器,可分段送入字节流。
+    feed() 返回完整帧中的记录列表 [(rotary_id, delta, value, ticks_us, button), ...],
+    校验错误的帧被丢弃并计入 errors
+    """
+
+    def __init__(self):
+        self._pending = b''
+        self.errors = 0
+
+    def feed(self, data):
+        buf = self._pending + bytes(data)
+        records = []
+        while True:
+            start = buf.find(_SYNC)
+            if start < 0:
+                # 保留最后一个字节,它可能是同步字的前半部分
+                buf = buf[-1:]
+                break
+            if len(buf) < start + _HEADER_SIZE:
+                buf = buf[start:]
+                break
+            count = buf[start + 2]
+            end = start + _HEADER_SIZE + count * _RECORD_SIZE
+            if len(buf) < end + 1:
+                buf = buf[start:]
+                break
+            if sum(buf[start + 2:end]) & 0xFF != buf[end]:
+                self.errors += 1
+                buf = buf[start + 1:]
+                continue
+            for i in range(count):
+                records.append(struct.unpack_from(_RECORD, buf, start + _HEADER_SIZE + i * _RECORD_SIZE))
+            buf = buf[end + 1:]
+        self._pending = buf
+        return records
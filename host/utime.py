@@ -0,0 +1,59 @@
+# Copyright (c) 2023 GeekerBear
+# Host-side stand-in for the MicroPython "utime" module
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+仅用于在 CPython 上运行 lib/ 下的模块。
+set_ticks_us() 可切换到虚拟时钟,使仿真结果与真实耗时无关;
+虚拟时钟前进时,host/machine.py 中到期的 Timer 按时间顺序触发
+"""
+
+import time
+
+_TICKS_PERIOD = 1 << 30
+_TICKS_MAX = _TICKS_PERIOD - 1
+_TICKS_HALFPERIOD = _TICKS_PERIOD // 2
+
+_virtual_us = None
+_on_advance = None  # 由 host/machine.py 设置,触发到期的虚拟定时器
+
+
+def set_ticks_us(t):
+    """设置虚拟时钟(微秒),传入 None 恢复真实时钟"""
+    global _virtual_us
+    if t is not None and _virtual_us is not None and _on_advance is not None:
+        _on_advance(t)
+    _virtual_us = t
+
+
+def ticks_us():
+    if _virtual_us is not None:
+        return _virtual_us & _TICKS_MAX
+    return int(time.perf_counter() * 1000000) & _TICKS_MAX
+
+
+def ticks_ms():
+    if _virtual_us is not None:
+        return (_virtual_us // 1000) & _TICKS_MAX
+    return int(time.perf_counter() * 1000) & _TICKS_MAX
+
+
+def ticks_cpu():
+    return ticks_us()
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & _TICKS_MAX
+
+
+def ticks_diff(ticks1, ticks2):
+    return ((ticks1 - ticks2 + _TICKS_HALFPERIOD) & _TICKS_MAX) - _TICKS_HALFPERIOD
+
+
+def sleep_ms(ms):
+    time.sleep(ms / 1000)
+
+
+def sleep_us(us):
+    time.sleep(us / 1000000)
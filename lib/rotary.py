@@ -14,8 +14,12 @@ DT	        GPIO
 CLK         GPIO
 """
 
+import machine
 import micropython
+import struct
 import utime
+from micropython import const
+from array import array
 
 _DIR_CW = const(0x10)  # Clockwise step
 _DIR_CCW = const(0x20)  # Counter-clockwise step
@@ -30,33 +34,185 @@ _R_CCW_2 = const(0x5)
 _R_CCW_3 = const(0x6)
 _R_ILLEGAL = const(0x7)
 
-_transition_table = [
-
-    # |------------- NEXT STATE -------------|            |CURRENT STATE|
-    # CLK/DT    CLK/DT     CLK/DT    CLK/DT
-    #   00        01         10        11
-    [_R_START, _R_CCW_1, _R_CW_1,  _R_START],             # _R_START
-    [_R_CW_2,  _R_START, _R_CW_1,  _R_START],             # _R_CW_1
-    [_R_CW_2,  _R_CW_3,  _R_CW_1,  _R_START],             # _R_CW_2
-    [_R_CW_2,  _R_CW_3,  _R_START, _R_START | _DIR_CW],   # _R_CW_3
-    [_R_CCW_2, _R_CCW_1, _R_START, _R_START],             # _R_CCW_1
-    [_R_CCW_2, _R_CCW_1, _R_CCW_3, _R_START],             # _R_CCW_2
-    [_R_CCW_2, _R_START, _R_CCW_3, _R_START | _DIR_CCW],  # _R_CCW_3
-    [_R_START, _R_START, _R_START, _R_START]]             # _R_ILLEGAL
-
-_transition_table_half_step = [
-    [_R_CW_3,            _R_CW_2,  _R_CW_1,  _R_START],
-    [_R_CW_3 | _DIR_CCW, _R_START, _R_CW_1,  _R_START],
-    [_R_CW_3 | _DIR_CW,  _R_CW_2,  _R_START, _R_START],
-    [_R_CW_3,            _R_CCW_2, _R_CCW_1, _R_START],
-    [_R_CW_3,            _R_CW_2,  _R_CCW_1, _R_START | _DIR_CW],
-    [_R_CW_3,            _R_CCW_2, _R_CW_3,  _R_START | _DIR_CCW],
-    [_R_START,           _R_START, _R_START, _R_START],
-    [_R_START,           _R_START, _R_START, _R_START]]
+# 原始的列表状态表只供参考实现 _next_state_ref 使用,第一次调用时才创建,
+# 解码内核使用下面展平的 bytes 状态表
+_ref_tables = None
+
+
+def _transition_tables():
+    global _ref_tables
+    if _ref_tables is not None:
+        return _ref_tables
+
+    _transition_table = [
+
+        # |------------- NEXT STATE -------------|            |CURRENT STATE|
+        # CLK/DT    CLK/DT     CLK/DT    CLK/DT
+        #   00        01         10        11
+        [_R_START, _R_CCW_1, _R_CW_1,  _R_START],             # _R_START
+        [_R_CW_2,  _R_START, _R_CW_1,  _R_START],             # _R_CW_1
+        [_R_CW_2,  _R_CW_3,  _R_CW_1,  _R_START],             # _R_CW_2
+        [_R_CW_2,  _R_CW_3,  _R_START, _R_START | _DIR_CW],   # _R_CW_3
+        [_R_CCW_2, _R_CCW_1, _R_START, _R_START],             # _R_CCW_1
+        [_R_CCW_2, _R_CCW_1, _R_CCW_3, _R_START],             # _R_CCW_2
+        [_R_CCW_2, _R_START, _R_CCW_3, _R_START | _DIR_CCW],  # _R_CCW_3
+        [_R_START, _R_START, _R_START, _R_START]]             # _R_ILLEGAL
+
+    _transition_table_half_step = [
+        [_R_CW_3,            _R_CW_2,  _R_CW_1,  _R_START],
+        [_R_CW_3 | _DIR_CCW, _R_START, _R_CW_1,  _R_START],
+        [_R_CW_3 | _DIR_CW,  _R_CW_2,  _R_START, _R_START],
+        [_R_CW_3,            _R_CCW_2, _R_CCW_1, _R_START],
+        [_R_CW_3,            _R_CW_2,  _R_CCW_1, _R_START | _DIR_CW],
+        [_R_CW_3,            _R_CCW_2, _R_CW_3,  _R_START | _DIR_CCW],
+        [_R_START,           _R_START, _R_START, _R_START],
+        [_R_START,           _R_START, _R_START, _R_START]]
+
+    # 四倍频(quarter_step): 状态即上一次的逻辑 CLK/DT 电平,每个格雷码边沿计数一次,方向与全步一致。
+    # CLK/DT 同时跳变(漏边沿)不计数
+    _transition_table_quarter_step = [
+        [0b00,            0b01 | _DIR_CW,  0b10 | _DIR_CCW, 0b11],            # 00
+        [0b00 | _DIR_CCW, 0b01,            0b10,            0b11 | _DIR_CW],   # 01
+        [0b00 | _DIR_CW,  0b01,            0b10,            0b11 | _DIR_CCW],  # 10
+        [0b00,            0b01 | _DIR_CCW, 0b10 | _DIR_CW,  0b11]]            # 11
+
+    _ref_tables = (_transition_table, _transition_table_half_step, _transition_table_quarter_step)
+    return _ref_tables
+
 
 _STATE_MASK = const(0x07)
 _DIR_MASK = const(0x30)
 
+# 展平的过渡状态表: 下标 = 当前状态 * 4 + CLK/DT,invert 已折叠进表中。
+# bytes 常量在冻结(frozen)模块中直接存放于 flash,不占用 RAM
+_TABLE_FULL = (
+    b'\x00\x04\x01\x00'  # _R_START
+    b'\x02\x00\x01\x00'  # _R_CW_1
+    b'\x02\x03\x01\x00'  # _R_CW_2
+    b'\x02\x03\x00\x10'  # _R_CW_3
+    b'\x05\x04\x00\x00'  # _R_CCW_1
+    b'\x05\x04\x06\x00'  # _R_CCW_2
+    b'\x05\x00\x06\x20'  # _R_CCW_3
+    b'\x00\x00\x00\x00')  # _R_ILLEGAL
+
+_TABLE_FULL_INVERT = (
+    b'\x00\x01\x04\x00'  # _R_START
+    b'\x00\x01\x00\x02'  # _R_CW_1
+    b'\x00\x01\x03\x02'  # _R_CW_2
+    b'\x10\x00\x03\x02'  # _R_CW_3
+    b'\x00\x00\x04\x05'  # _R_CCW_1
+    b'\x00\x06\x04\x05'  # _R_CCW_2
+    b'\x20\x06\x00\x05'  # _R_CCW_3
+    b'\x00\x00\x00\x00')  # _R_ILLEGAL
+
+_TABLE_HALF = (
+    b'\x03\x02\x01\x00'  # _R_START
+    b'\x23\x00\x01\x00'  # _R_CW_1
+    b'\x13\x02\x00\x00'  # _R_CW_2
+    b'\x03\x05\x04\x00'  # _R_CW_3
+    b'\x03\x02\x04\x10'  # _R_CCW_1
+    b'\x03\x05\x03\x20'  # _R_CCW_2
+    b'\x00\x00\x00\x00'  # _R_CCW_3
+    b'\x00\x00\x00\x00')  # _R_ILLEGAL
+
+_TABLE_HALF_INVERT = (
+    b'\x00\x01\x02\x03'  # _R_START
+    b'\x00\x01\x00\x23'  # _R_CW_1
+    b'\x00\x00\x02\x13'  # _R_CW_2
+    b'\x00\x04\x05\x03'  # _R_CW_3
+    b'\x10\x04\x02\x03'  # _R_CCW_1
+    b'\x20\x03\x05\x03'  # _R_CCW_2
+    b'\x00\x00\x00\x00'  # _R_CCW_3
+    b'\x00\x00\x00\x00')  # _R_ILLEGAL
+
+# 四倍频状态表只有 4 个状态(上一次的逻辑 CLK/DT 电平)
+_TABLE_QUARTER = (
+    b'\x00\x11\x22\x03'  # 00
+    b'\x20\x01\x02\x13'  # 01
+    b'\x10\x01\x02\x23'  # 10
+    b'\x00\x21\x12\x03')  # 11
+
+_TABLE_QUARTER_INVERT = (
+    b'\x03\x22\x11\x00'  # 00
+    b'\x13\x02\x01\x20'  # 01
+    b'\x23\x02\x01\x10'  # 10
+    b'\x03\x12\x21\x00')  # 11
+
+def _select_table(half_step, invert, quarter_step=False):
+    if quarter_step:
+        return _TABLE_QUARTER_INVERT if invert else _TABLE_QUARTER
+    if half_step:
+        return _TABLE_HALF_INVERT if invert else _TABLE_HALF
+    return _TABLE_FULL_INVERT if invert else _TABLE_FULL
+
+
+def _next_state_ref(state, clk_dt_pins, half_step, invert, quarter_step=False):
+    """纯 Python 参考实现,与原始的列表状态表逐项对应"""
+    if invert:
+        clk_dt_pins = ~clk_dt_pins & 0x03
+    full, half, quarter = _transition_tables()
+    if quarter_step:
+        return quarter[state & 0x03][clk_dt_pins]
+    if half_step:
+        return half[state & _STATE_MASK][clk_dt_pins]
+    return full[state & _STATE_MASK][clk_dt_pins]
+
+
+# 解码内核: 每个边沿只做一次读表。优先使用 rotary_kernel 中的 viper 实现;
+# 端口不支持 native 代码(SyntaxError)、.mpy 架构不符(ValueError)或在 CPython 上
+# (ptr8 未定义,NameError)时退回纯 Python
+try:
+    from rotary_kernel import next_state as _next_state
+except (ImportError, SyntaxError, ValueError, NameError):
+    def _next_state(table, state, clk_dt_pins):
+        return table[((state & _STATE_MASK) << 2) | clk_dt_pins]
+
+# 漏边沿补偿: 顺时针/逆时针方向的下一个逻辑 CLK/DT 电平 (11 -> 10 -> 00 -> 01 -> 11)
+_CW_NEXT = b'\x01\x03\x00\x02'
+_CCW_NEXT = b'\x02\x00\x03\x01'
+_RESYNC_WINDOW_US = const(100000)
+
+# 超过该时间没有定位点,速度视为0
+_VELOCITY_TIMEOUT_US = const(500000)
+
+# 尚未注册监听器时共用的空元组,不分配列表
+_NO_LISTENER = ()
+
+# 事件队列记录类型
+_EV_CHANGE = const(0)
+_EV_BUTTON = const(1)
+_EV_DBCLICK = const(2)
+_EV_COUNTER = const(3)
+_EV_LONG = const(4)
+_EV_REPEAT = const(5)
+
+# 统计计数器下标
+_ST_EDGES = const(0)
+_ST_DETENTS = const(1)
+_ST_BOUNCES = const(2)
+_ST_ERRORS = const(3)
+_ST_ISR_COUNT = const(4)
+_ST_ISR_SUM = const(5)
+_ST_ISR_MIN = const(6)
+_ST_ISR_MAX = const(7)
+_ST_HIST = const(8)  # 中断耗时直方图: <16us, <32us, ... , >=1024us
+_ST_HIST_BINS = const(8)
+_ST_SIZE = const(16)
+# 计数器上限: array('I') 中超过小整数范围的值读出时会分配长整数,硬中断中不允许
+_ST_LIMIT = const(0x3fffffff)
+
+# 采样记录文件: 文件头 '<4sBBIB' (magic, 版本, 标志, 记录数, 起始电平),每条记录 '<IB' (ticks_us, 采样)
+# 标志位: bit0 half_step, bit1 invert, bit2 quarter_step
+# 采样位: bit0 DT, bit1 CLK, bit2 按钮, bit3 按钮中断触发(否则为编码器中断)
+# 起始电平为第一条记录之前的 CLK/DT/按钮电平(采样位 bit0-2):开始记录时的电平,
+# 环形缓冲区覆盖旧记录后为最后一条被覆盖的采样。版本 1 的文件没有起始电平
+_CAPTURE_MAGIC = b'RTRC'
+_CAPTURE_VERSION = const(2)
+_CAPTURE_HEADER = '<4sBBIB'
+_CAPTURE_LEVEL = const(0x07)
+_CAPTURE_BTN = const(0x04)
+_CAPTURE_BTN_EDGE = const(0x08)
+
 
 def _wrap(value, incr, lower_bound, upper_bound):
     range = upper_bound - lower_bound + 1
@@ -88,6 +244,48 @@ def _trigger_counter(rotary_instance, rotary_id, count):
     for listener in rotary_instance._counter_listener:
         listener(rotary_id, count)
 
+def _trigger_long(rotary_instance, rotary_id, t):
+    for listener in rotary_instance._long_listener:
+        listener(rotary_id, t)
+
+def _trigger_repeat(rotary_instance, rotary_id, count):
+    for listener in rotary_instance._repeat_listener:
+        listener(rotary_id, count)
+
+
+def _build_map(mapping, min_val, max_val):
+    if not mapping:
+        return None
+    from rotary_map import build
+    return build(mapping, max_val - min_val + 1)
+
+
+def _throttle(listener, max_hz):
+    if not max_hz:
+        return listener
+    from rotary_throttle import Throttle
+    return Throttle(listener, max_hz)
+
+
+def _asyncio():
+    try:
+        import asyncio
+    except ImportError:
+        import uasyncio as asyncio
+    return asyncio
+
+
+class _EventStream(object):
+
+    def __init__(self, rotary):
+        self._rotary = rotary
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self._rotary.changed()
+
 
 class Rotary(object):
 
@@ -98,8 +296,29 @@ class Rotary(object):
     BUTTON_PRESS = const(0) # 按钮按下
     BUTTON_RELEASE = const(1) # 按钮释放
 
-    def __init__(self, min_val, max_val, incr, reverse, range_mode, half_step, invert, rotary_id, btn_value):
+    # add_event_listener 监听器收到的事件类型
+    EVENT_CHANGE = const(0) # 数值改变 (value, delta)
+    EVENT_BUTTON = const(1) # 按下/释放 (state, 按下时长ms)
+    EVENT_DBCLICK = const(2) # 双击
+    EVENT_COUNTER = const(3) # 连续按下 (次数)
+    EVENT_LONG = const(4) # 长按 (按下时长ms)
+    EVENT_REPEAT = const(5) # 长按重复 (次数)
+
+    def __init__(self, min_val, max_val, incr, reverse, range_mode, half_step, invert, rotary_id, btn_value,
+                 event_queue=8, accel=None, click_ms=250, long_ms=0, repeat_ms=0, stats=False, capture=0,
+                 glitch_us=0, btn_glitch_us=0, resync=False, velocity_window=4, quarter_step=False,
+                 mapping=None):
         # invert  将CLK和DT信号反相。当编码器静止值为CLK，DT=00时使用
+        # event_queue  事件队列长度。中断只记录事件,由 micropython.schedule 在中断外调用监听器;为0时在中断内直接调用
+        # accel  加速曲线 ((间隔us, 倍数), ...),两个定位点间隔小于间隔us时步长乘以倍数,None 为不加速
+        # click_ms  连击判定窗口;long_ms 长按时间,0 为不检测;repeat_ms 长按后重复触发的间隔,0 为不重复
+        # stats  启用运行统计,见 stats()
+        # capture  原始采样环形缓冲区长度,0 为不记录,见 dump_capture()
+        # glitch_us/btn_glitch_us  编码器/按钮两次边沿的最小间隔(us),间隔更短的边沿视为抖动直接丢弃
+        # resync  检测 CLK/DT 同时跳变(漏掉边沿),按最近的转动方向补上中间边沿
+        # velocity_window  计算速度所用的定位点时间戳个数(平滑窗口),至少为2
+        # quarter_step  四倍频,每个格雷码边沿计数一次(光电编码器、精细定位),优先于 half_step
+        # mapping  数值映射表或生成器规格,事件和 mapped_value() 返回映射后的值,见 rotary_map
         self._rotary_id = rotary_id
         self._min_val = min_val
         self._max_val = max_val
@@ -108,24 +327,138 @@ class Rotary(object):
         self._range_mode = range_mode
         self._value = min_val
         self._direction = 0
-        self._state = _R_START
         self._half_step = half_step
+        self._quarter_step = quarter_step
         self._invert = invert
+        self._table = _select_table(half_step, invert, quarter_step)
+        self._state = self._start_state()
         self._listener = []
         self._btn_value = btn_value
         self._btn_press_time = 0
-        self._btn_press_count = 0
-        self._button_listener = []
-        self._dbclick_listener = []
-        self._counter_listener = []
-        
+        self._click_ms = click_ms
+        self._long_ms = long_ms
+        self._repeat_ms = repeat_ms
+        self._button_timer_ref = self._process_button_timer
+        # 按钮监听器列表在第一次注册时才创建
+        self._button_listener = _NO_LISTENER
+        self._dbclick_listener = _NO_LISTENER
+        self._counter_listener = _NO_LISTENER
+        self._long_listener = _NO_LISTENER
+        self._repeat_listener = _NO_LISTENER
+        # 连击/长按计时见 rotary_button,用到时才导入
+        self._button = None
+        if long_ms or repeat_ms:
+            self._enable_button_timing()
+        # 回调在注册时解析一次,边沿处理中不再调用 dir(self)
+        self.change_callback_func = None
+        self.click_callback_func = None
+        self.counter_callback_func = None
+        self.dbclick_callback_func = None
+        self.long_press_callback_func = None
+        self.repeat_callback_func = None
+        # 预分配的事件环形缓冲区 (kind, value, delta, timestamp, seq),多留一格区分满和空
+        size = event_queue + 1 if event_queue else 0
+        self._ev_size = size
+        self._ev_kind = bytearray(size)
+        self._ev_value = array('i', bytes(4 * size))
+        self._ev_delta = array('i', bytes(4 * size))
+        self._ev_time = array('i', bytes(4 * size))
+        self._ev_seqs = array('i', bytes(4 * size))
+        self._ev_seq = 0
+        self._event_listener = _NO_LISTENER
+        self._ev_head = 0
+        self._ev_tail = 0
+        self._ev_pending = False
+        self._ev_overflow = 0
+        self._ev_dispatch_ref = self._dispatch_events
+        self._detent_us = 0
+        self._last_dir = 0
+        self._set_accel(accel)
+        self._polling = False
+        self._storm_limit = 0
+        self._tsf = None
+        self._async_delta = 0
+        self._seq = 0
+        self._change_us = 0
+        self._poll_delta = 0
+        self._stats = array('I', bytes(4 * _ST_SIZE)) if stats else None
+        self.reset_stats()
+        self._cap_size = capture
+        self._cap_sample = bytearray(capture) if capture else None
+        self._cap_time = array('I', bytes(4 * capture))
+        self._cap_head = 0
+        self._cap_count = 0
+        self._cap_pins = (self._hal_get_clk_value() << 1) | self._hal_get_dt_value() if capture else 0
+        self._cap_start = self._cap_pins | (_CAPTURE_BTN if btn_value else 0)
+        self._glitch_us = glitch_us
+        self._btn_glitch_us = btn_glitch_us
+        self._edge_us = utime.ticks_us()
+        self._btn_edge_us = self._edge_us
+        self._glitch_count = 0
+        self._resync = resync
+        self._last_pins = (self._hal_get_clk_value() << 1) | self._hal_get_dt_value()
+        self._resync_count = 0
+        self._resync_missed = 0
+        self._vel_size = max(2, velocity_window)
+        self._vel_time = array('I', bytes(4 * self._vel_size))
+        self._vel_head = 0
+        self._vel_count = 0
+        self._map_spec = mapping or None
+        self._map = _build_map(mapping, min_val, max_val)
+
+    @staticmethod
+    def accel_exp(max_factor=10, fast_us=2000, slow_us=40000, steps=6):
+        """
+        生成指数加速曲线:间隔 fast_us 时步长乘 max_factor,到 slow_us 时回落到 1
+        """
+        accel = []
+        for k in range(steps):
+            x = k / (steps - 1)
+            factor = int(max_factor ** (1 - x) + 0.5)
+            if factor > 1:
+                accel.append((int(fast_us * (slow_us / fast_us) ** x), factor))
+        return accel
+
+    def _set_accel(self, accel):
+        self._accel_us, self._accel_factor = self._accel_tables(accel)
+
+    @staticmethod
+    def _accel_tables(accel):
+        if not accel:
+            return None, None
+        accel = sorted(accel)
+        return array('i', [t for t, _ in accel]), array('H', [f for _, f in accel])
+
+    def _start_state(self):
+        # 四倍频的状态就是当前逻辑电平,其余状态表从 _R_START 开始
+        if self._quarter_step:
+            pins = (self._hal_get_clk_value() << 1) | self._hal_get_dt_value()
+            return pins ^ 0x03 if self._invert else pins
+        return _R_START
 
     def set(self, value=None, min_val=None, incr=None,
-            max_val=None, reverse=None, range_mode=None):
-        # disable DT and CLK pin interrupts
-        """设置参数"""
-        self._hal_disable_irq()
+            max_val=None, reverse=None, range_mode=None, accel=None,
+            half_step=None, quarter_step=None, mapping=None):
+        """
+        设置参数,accel=() 关闭加速,mapping=() 取消数值映射。
+        只在很短的临界区内更新参数,不注销引脚中断;解码模式不变时保留进行中的状态
+        """
+        # 分配内存的工作放在临界区之外
+        if accel is not None:
+            accel_us, accel_factor = self._accel_tables(accel)
+        map_spec = self._map_spec if mapping is None else mapping or None
+        if mapping is not None or min_val is not None or max_val is not None:
+            table = _build_map(map_spec,
+                               self._min_val if min_val is None else min_val,
+                               self._max_val if max_val is None else max_val)
+        else:
+            table = self._map
+        half_step = self._half_step if half_step is None else half_step
+        quarter_step = self._quarter_step if quarter_step is None else quarter_step
+        mode_changed = half_step != self._half_step or quarter_step != self._quarter_step
+        decode_table = _select_table(half_step, self._invert, quarter_step)
 
+        irq_state = machine.disable_irq()
         if value is not None:
             self._value = value
         if min_val is not None:
@@ -138,36 +471,257 @@ class Rotary(object):
             self._reverse = -1 if reverse else 1
         if range_mode is not None:
             self._range_mode = range_mode
-        self._state = _R_START
-
-        # enable DT and CLK pin interrupts
-        self._hal_enable_irq()
+        if accel is not None:
+            self._accel_us = accel_us
+            self._accel_factor = accel_factor
+        if mode_changed:
+            self._half_step = half_step
+            self._quarter_step = quarter_step
+            self._table = decode_table
+            self._state = self._start_state()
+        self._map_spec = map_spec
+        self._map = table
+        machine.enable_irq(irq_state)
 
     def value(self):
         """当前值"""
         return self._value
+
+    def mapped_value(self):
+        """映射后的当前值,没有设置 mapping 时与 value() 相同"""
+        return self._mapped(self._value)
+
+    def _mapped(self, value):
+        table = self._map
+        if table is None:
+            return value
+        # 无边界模式下超出范围的值取表的两端
+        i = value - self._min_val
+        if i < 0:
+            i = 0
+        elif i >= len(table):
+            i = len(table) - 1
+        return table[i]
     
     def direction(self):
         """旋钮方向"""
         return self._direction
 
+    def velocity(self):
+        """
+        转速(定位点/秒),顺时针为正。读取时才根据最近 velocity_window 个定位点的时间戳计算
+        """
+        state = machine.disable_irq()
+        count = self._vel_count
+        head = self._vel_head
+        newest = self._vel_time[head - 1]
+        oldest = self._vel_time[head - count] if count else 0
+        last_dir = self._last_dir
+        machine.enable_irq(state)
+
+        if count < 2:
+            return 0.0
+        idle = utime.ticks_diff(utime.ticks_us(), newest)
+        if idle > _VELOCITY_TIMEOUT_US:
+            return 0.0
+        span = max(1, utime.ticks_diff(newest, oldest))
+        rate = (count - 1) * 1000000 / span
+        # 当前的停顿已超过平均间隔的两倍,说明正在减速
+        if idle * (count - 1) > 2 * span:
+            rate = min(rate, 1000000 / idle)
+        return rate if (last_dir == _DIR_CW) == (self._reverse == 1) else -rate
+
+    def rpm(self, pulses_per_rev):
+        """转速(转/分钟),pulses_per_rev 为编码器每圈定位点数"""
+        return self.velocity() * 60 / pulses_per_rev
+
+    def snapshot(self):
+        """
+        一次读取 (value, direction, seq, ticks_us),数值与方向来自同一个定位点。
+        seq 每次数值变化加 1,轮询时比较 seq 即可知道是否有新的转动
+        """
+        state = machine.disable_irq()
+        snapshot = (self._value, self._direction, self._seq, self._change_us)
+        machine.enable_irq(state)
+        return snapshot
+
+    def take_delta(self):
+        """
+        返回上次调用以来累计的变化量并清零,轮询的主循环可以一次处理所有转动。
+        有界模式下为实际变化量,不会超出边界;包裹模式下为累计步长,跨越边界后
+        应对 value() 取值而不是把 delta 加到旧值上
+        """
+        state = machine.disable_irq()
+        delta = self._poll_delta
+        self._poll_delta = 0
+        machine.enable_irq(state)
+        return delta
+
     def reset(self):
         """重置当前值"""
+        state = machine.disable_irq()
         self._value = 0
+        machine.enable_irq(state)
 
     def close(self):
-        """关闭"""
+        """关闭,并释放 max_hz 限速监听器占用的定时器槽位"""
         self._hal_close()
+        for listener in self._listener:
+            if getattr(listener, 'listener', None) is not None:
+                listener.close()
+        if getattr(self.change_callback_func, 'listener', None) is not None:
+            self.change_callback_func.close()
+
+    def stats(self):
+        """
+        运行统计。
+        overflows 事件队列溢出, glitches 被抖动过滤丢弃的边沿,
+        resyncs 补上的漏边沿, resync_missed 无法判断方向的漏边沿;
+        启用 stats 时另有 edges 边沿数, detents 有效定位点,
+        bounces 未完成定位点就回到起始状态的次数(抖动), errors 监听器异常, isr_* 编码器中断耗时(us)。
+        计数器到 0x3fffffff 后不再增加
+        """
+        result = {
+            'overflows': self._ev_overflow,
+            'glitches': self._glitch_count,
+            'resyncs': self._resync_count,
+            'resync_missed': self._resync_missed,
+        }
+        st = self._stats
+        if st is not None:
+            count = st[_ST_ISR_COUNT]
+            result['edges'] = st[_ST_EDGES]
+            result['detents'] = st[_ST_DETENTS]
+            result['bounces'] = st[_ST_BOUNCES]
+            result['errors'] = st[_ST_ERRORS]
+            result['isr_min_us'] = st[_ST_ISR_MIN] if count else 0
+            result['isr_max_us'] = st[_ST_ISR_MAX]
+            result['isr_mean_us'] = st[_ST_ISR_SUM] // count if count else 0
+            result['isr_hist'] = tuple(st[_ST_HIST:_ST_HIST + _ST_HIST_BINS])
+        return result
+
+    def reset_stats(self):
+        """清零运行统计"""
+        self._ev_overflow = 0
+        self._glitch_count = 0
+        self._resync_count = 0
+        self._resync_missed = 0
+        st = self._stats
+        if st is not None:
+            state = machine.disable_irq()
+            for i in range(_ST_SIZE):
+                st[i] = 0
+            st[_ST_ISR_MIN] = _ST_LIMIT
+            machine.enable_irq(state)
+
+    def dump_capture(self, path):
+        """将记录的原始采样按时间顺序写入二进制文件,返回记录数"""
+        if self._cap_sample is None:
+            raise ValueError('capture is not enabled')
+        state = machine.disable_irq()
+        samples = bytes(self._cap_sample)
+        times = array('I', self._cap_time)
+        head = self._cap_head
+        count = self._cap_count
+        start = self._cap_start
+        machine.enable_irq(state)
 
-    def add_listener(self, l):
-        self._listener.append(l)
+        flags = (1 if self._half_step else 0) | (2 if self._invert else 0) | (4 if self._quarter_step else 0)
+        record = bytearray(5)
+        with open(path, 'wb') as f:
+            f.write(struct.pack(_CAPTURE_HEADER, _CAPTURE_MAGIC, _CAPTURE_VERSION, flags, count, start))
+            i = head - count
+            if i < 0:
+                i += self._cap_size
+            for _ in range(count):
+                struct.pack_into('<IB', record, 0, times[i], samples[i])
+                f.write(record)
+                i += 1
+                if i == self._cap_size:
+                    i = 0
+        return count
+
+    def _capture(self, sample):
+        i = self._cap_head
+        if self._cap_count == self._cap_size:
+            # 被覆盖的采样成为剩余记录的起始电平
+            self._cap_start = self._cap_sample[i] & _CAPTURE_LEVEL
+        self._cap_sample[i] = sample
+        self._cap_time[i] = utime.ticks_us()
+        i += 1
+        self._cap_head = 0 if i == self._cap_size else i
+        if self._cap_count < self._cap_size:
+            self._cap_count += 1
+
+    async def changed(self):
+        """
+        等待数值变化,返回 (rotary_id, value, delta)。
+        两次等待之间的多次变化合并为一个事件,delta 与 take_delta() 的含义相同
+        """
+        if self._tsf is None:
+            self._tsf = _asyncio().ThreadSafeFlag()
+        while True:
+            await self._tsf.wait()
+            state = machine.disable_irq()
+            delta = self._async_delta
+            self._async_delta = 0
+            value = self._value
+            machine.enable_irq(state)
+            if delta:
+                return self._rotary_id, self._mapped(value), delta
+
+    def events(self):
+        """
+        数值变化事件的异步迭代器: async for rotary_id, value, delta in rotary.events()
+        """
+        return _EventStream(self)
+
+    def add_listener(self, l, max_hz=0):
+        """
+        添加数值改变监听器。max_hz 大于0时每秒最多调用 max_hz 次,
+        期间的步数累加到 direction 参数中,转动停止后仍会送达最后一个值,见 rotary_throttle
+        """
+        self._listener.append(_throttle(l, max_hz))
 
     def remove_listener(self, l):
-        if l not in self._listener:
-            raise ValueError('{} is not an installed listener'.format(l))
-        self._listener.remove(l)
+        # 用 == 比较,每次取得的绑定方法都是新对象
+        for listener in self._listener:
+            if listener == l or getattr(listener, 'listener', None) == l:
+                self._listener.remove(listener)
+                if listener != l:
+                    listener.close()
+                return
+        raise ValueError('{} is not an installed listener'.format(l))
     
+    def _enable_button_timing(self):
+        """导入连击/长按计时并创建相应的监听器列表,在中断外调用"""
+        if self._button is None:
+            from rotary_button import ButtonTiming
+            self._dbclick_listener = []
+            self._counter_listener = []
+            self._long_listener = []
+            self._repeat_listener = []
+            self._button = ButtonTiming(self)
+
+    def add_event_listener(self, l):
+        """
+        扩展形式的监听器,接收所有事件: l(rotary_id, kind, value, delta, ticks_us, seq)。
+        kind 为 Rotary.EVENT_*;EVENT_CHANGE 的 value 是事件发生时未经 mapping 映射的原始值。
+        ticks_us 是中断中记录事件的时间,可计算端到端延迟、对多个编码器的事件排序;
+        seq 是该编码器的事件序号,不连续说明事件队列溢出
+        """
+        if self._event_listener is _NO_LISTENER:
+            self._event_listener = []
+        self._event_listener.append(l)
+
+    def remove_event_listener(self, l):
+        if l not in self._event_listener:
+            raise ValueError('{} is not an installed event_listener'.format(l))
+        self._event_listener.remove(l)
+
     def add_button_listener(self, l):
+        if self._button_listener is _NO_LISTENER:
+            self._button_listener = []
         self._button_listener.append(l)
         
     def remove_button_listener(self, l):
@@ -176,6 +730,7 @@ class Rotary(object):
         self._button_listener.remove(l)
         
     def add_counter_listener(self, l):
+        self._enable_button_timing()
         self._counter_listener.append(l)
         
     def remove_counter_listener(self, l):
@@ -184,42 +739,180 @@ class Rotary(object):
         self._counter_listener.remove(l)
         
     def add_dbclick_listener(self, l):
+        self._enable_button_timing()
         self._dbclick_listener.append(l)
         
     def remove_dbclick_listener(self, l):
         if l not in self._dbclick_listener:
             raise ValueError('{} is not an installed dbclick_listener'.format(l))
         self._dbclick_listener.remove(l)
+
+    def add_long_press_listener(self, l):
+        self._enable_button_timing()
+        self._long_listener.append(l)
+
+    def remove_long_press_listener(self, l):
+        if l not in self._long_listener:
+            raise ValueError('{} is not an installed long_press_listener'.format(l))
+        self._long_listener.remove(l)
+
+    def add_repeat_listener(self, l):
+        self._enable_button_timing()
+        self._repeat_listener.append(l)
+
+    def remove_repeat_listener(self, l):
+        if l not in self._repeat_listener:
+            raise ValueError('{} is not an installed repeat_listener'.format(l))
+        self._repeat_listener.remove(l)
         
+    def _init_polling(self, poll_hz, idle_hz, idle_ms, storm_hz=0):
+        """
+        定时采样参数。poll_hz 转动时的采样率,空闲 idle_ms 后降到 idle_hz;
+        storm_hz 大于0时,中断模式下边沿速率超过该值(次/秒)临时切换到采样,空闲后恢复中断
+        """
+        self._poll_hz = poll_hz
+        self._poll_idle_hz = idle_hz
+        self._poll_idle_ms = idle_ms
+        self._poll_fast = False
+        self._poll_active = utime.ticks_ms()
+        self._poll_pins = 0
+        self._poll_sample_ref = self._poll_sample
+        self._storm_limit = storm_hz // 10  # 每 100ms 的边沿数
+        self._storm_t0 = self._poll_active
+        self._storm_edges = 0
+        self._storm_ref = self._enter_polling
+
+    def _start_polling(self, fast):
+        self._poll_pins = (self._hal_get_clk_value() << 1) | self._hal_get_dt_value()
+        self._poll_fast = fast
+        self._poll_active = utime.ticks_ms()
+        self._polling = True
+        self._hal_poll_start(self._poll_hz if fast else self._poll_idle_hz, self._poll_sample_ref)
+
+    def _enter_polling(self, _):
+        """边沿速率过高,关闭引脚中断改为定时采样"""
+        if self._polling:
+            return
+        self._hal_disable_pin_irq()
+        self._start_polling(True)
+
+    def _poll_sample(self, t):
+        """定时采样 CLK/DT/按钮,变化时送入与中断相同的处理函数"""
+        clk_dt_pins = (self._hal_get_clk_value() << 1) | self._hal_get_dt_value()
+        now = utime.ticks_ms()
+        active = False
+        if clk_dt_pins != self._poll_pins:
+            self._poll_pins = clk_dt_pins
+            self._process_rotary_pins(None)
+            active = True
+        if self._hal_get_btn_value() != self._btn_value:
+            self._process_button_pins(None)
+            active = True
+
+        if active:
+            self._poll_active = now
+            if not self._poll_fast:
+                self._poll_fast = True
+                self._hal_poll_start(self._poll_hz, self._poll_sample_ref)
+        elif self._poll_fast and utime.ticks_diff(now, self._poll_active) >= self._poll_idle_ms:
+            if self._storm_limit:
+                # 由中断临时切换来的采样,空闲后恢复中断
+                self._hal_poll_stop()
+                self._polling = False
+                self._hal_enable_pin_irq()
+            else:
+                self._poll_fast = False
+                self._hal_poll_start(self._poll_idle_hz, self._poll_sample_ref)
+
     def _process_rotary_pins(self, pin):
         """处理编码器"""
-        old_value = self._value
-        clk_dt_pins = (self._hal_get_clk_value() <<
-                       1) | self._hal_get_dt_value()
-        
-                       
-        if self._invert:
-            clk_dt_pins = ~clk_dt_pins & 0x03
-            
+        if self._cap_sample is not None:
+            # 在抖动过滤之前记录,采样保持原始边沿,回放时可比较不同的 glitch_us
+            clk_dt_pins = (self._hal_get_clk_value() << 1) | self._hal_get_dt_value()
+            self._cap_pins = clk_dt_pins
+            self._capture(clk_dt_pins | (_CAPTURE_BTN if self._btn_value else 0))
+
+        if self._glitch_us:
+            now = utime.ticks_us()
+            # 超过 ticks 半周期没有边沿时差值为负,不视为抖动
+            if 0 <= utime.ticks_diff(now, self._edge_us) < self._glitch_us:
+                self._glitch_count += 1
+                return
+            self._edge_us = now
+
+        st = self._stats
+        if st is not None:
+            t0 = utime.ticks_us()
+
+        if self._storm_limit and not self._polling:
+            now = utime.ticks_ms()
+            if utime.ticks_diff(now, self._storm_t0) >= 100:
+                self._storm_t0 = now
+                self._storm_edges = 0
+            self._storm_edges += 1
+            if self._storm_edges == self._storm_limit:
+                try:
+                    micropython.schedule(self._storm_ref, None)
+                except RuntimeError:
+                    self._storm_edges = 0
+
+        # 未启用采样记录时,被过滤的抖动边沿不读取引脚
+        if self._cap_sample is None:
+            clk_dt_pins = (self._hal_get_clk_value() <<
+                           1) | self._hal_get_dt_value()
+
+        if self._resync:
+            # CLK 和 DT 同时变化,说明中间漏掉了一个边沿
+            if clk_dt_pins ^ self._last_pins == 0x03:
+                self._resync_edge()
+            self._last_pins = clk_dt_pins
+
         # Determine next state
-        
-        if self._half_step:
-            self._state = _transition_table_half_step[self._state &
-                                                      _STATE_MASK][clk_dt_pins]
-        else:
-            self._state = _transition_table[self._state &
-                                            _STATE_MASK][clk_dt_pins]
+        old_state = self._state
+        self._state = _next_state(self._table, old_state, clk_dt_pins)
         direction = self._state & _DIR_MASK
-        
+        if direction:
+            self._detent(direction)
+        else:
+            self._direction = 0
+
+        if st is not None:
+            if st[_ST_EDGES] < _ST_LIMIT:
+                st[_ST_EDGES] += 1
+            if direction:
+                if st[_ST_DETENTS] < _ST_LIMIT:
+                    st[_ST_DETENTS] += 1
+            elif not self._quarter_step and self._state == _R_START and old_state & _STATE_MASK != _R_START:
+                if st[_ST_BOUNCES] < _ST_LIMIT:
+                    st[_ST_BOUNCES] += 1
+            self._record_isr_time(st, utime.ticks_diff(utime.ticks_us(), t0))
+
+    def _detent(self, direction):
+        """完成一个定位点,更新数值并记录事件"""
+        now = utime.ticks_us()
+        interval = utime.ticks_diff(now, self._detent_us)
+        self._detent_us = now
+
+        i = self._vel_head
+        self._vel_time[i] = now
+        i += 1
+        self._vel_head = 0 if i == self._vel_size else i
+        if self._vel_count < self._vel_size:
+            self._vel_count += 1
+
+        incr = self._incr if direction == _DIR_CW else -self._incr
 
-        incr = 0
-        if direction == _DIR_CW:
-            incr = self._incr
-        elif direction == _DIR_CCW:
-            incr = -self._incr
+        # 只在同方向连续转动时加速,换向后恢复原步长
+        if self._accel_us is not None and direction == self._last_dir and interval >= 0:
+            for i in range(len(self._accel_us)):
+                if interval < self._accel_us[i]:
+                    incr *= self._accel_factor[i]
+                    break
+        self._last_dir = direction
 
         incr *= self._reverse
 
+        old_value = self._value
         if self._range_mode == self.RANGE_WRAP:
             self._value = _wrap(
                 self._value,
@@ -237,91 +930,233 @@ class Rotary(object):
             
         self._direction = incr
 
+        if old_value != self._value:
+            # 有界模式下 delta 为实际的变化量(到达边界时小于步长);
+            # 包裹模式下为步长,跨越边界时与数值之差不同
+            if self._range_mode == self.RANGE_BOUNDED:
+                delta = self._value - old_value
+            else:
+                delta = incr
+            self._seq += 1
+            self._change_us = now
+            self._poll_delta += delta
+            if self._tsf is not None:
+                self._async_delta += delta
+                self._tsf.set()
+            self._post_event(_EV_CHANGE, self._value, delta)
+
+    def _resync_edge(self):
+        """
+        补上漏掉的中间边沿。方向取自进行中的全步状态,
+        或 _RESYNC_WINDOW_US 内最近一个定位点的方向;无法判断时只计数
+        """
+        state = self._state & _STATE_MASK
+        full_step = not self._half_step and not self._quarter_step
+        if full_step and _R_CW_1 <= state <= _R_CW_3:
+            cw = True
+        elif full_step and _R_CCW_1 <= state <= _R_CCW_3:
+            cw = False
+        elif self._last_dir and 0 <= utime.ticks_diff(utime.ticks_us(), self._detent_us) < _RESYNC_WINDOW_US:
+            # 半步状态表的方向与全步相反
+            cw = (self._last_dir == _DIR_CW) != bool(self._half_step and not self._quarter_step)
+        else:
+            self._resync_missed += 1
+            return
+
+        invert = 0x03 if self._invert else 0
+        logical = self._last_pins ^ invert
+        mid = (_CW_NEXT[logical] if cw else _CCW_NEXT[logical]) ^ invert
+        self._resync_count += 1
+        self._state = _next_state(self._table, self._state, mid)
+        direction = self._state & _DIR_MASK
+        if direction:
+            self._detent(direction)
+
+    def _record_isr_time(self, st, us):
+        # 总耗时接近上限时总耗时和次数同时减半,平均值不变
+        if st[_ST_ISR_SUM] > _ST_LIMIT - us or st[_ST_ISR_COUNT] == _ST_LIMIT:
+            st[_ST_ISR_SUM] >>= 1
+            st[_ST_ISR_COUNT] >>= 1
+        st[_ST_ISR_COUNT] += 1
+        st[_ST_ISR_SUM] += us
+        if us < st[_ST_ISR_MIN]:
+            st[_ST_ISR_MIN] = us
+        if us > st[_ST_ISR_MAX]:
+            st[_ST_ISR_MAX] = us
+        i = 0
+        us >>= 4
+        while us and i < _ST_HIST_BINS - 1:
+            us >>= 1
+            i += 1
+        if st[_ST_HIST + i] < _ST_LIMIT:
+            st[_ST_HIST + i] += 1
+
+    def _post_event(self, kind, value, delta):
+        """在中断中记录事件,溢出时只计数"""
+        # 序号对每个事件递增,溢出丢弃的事件也占用序号,监听器可据此发现丢失
+        seq = (self._ev_seq + 1) & 0x3fffffff
+        self._ev_seq = seq
+        if self._ev_size == 0:
+            self._dispatch_event(kind, value, delta, utime.ticks_us(), seq)
+            return
+
+        head = self._ev_head
+        next_head = head + 1
+        if next_head == self._ev_size:
+            next_head = 0
+        if next_head == self._ev_tail:
+            self._ev_overflow += 1
+        else:
+            self._ev_kind[head] = kind
+            self._ev_value[head] = value
+            self._ev_delta[head] = delta
+            self._ev_time[head] = utime.ticks_us()
+            self._ev_seqs[head] = seq
+            self._ev_head = next_head
+
+        if not self._ev_pending:
+            self._ev_pending = True
+            try:
+                micropython.schedule(self._ev_dispatch_ref, None)
+            except RuntimeError:
+                # 调度队列已满,留待下一个事件重新调度
+                self._ev_pending = False
+
+    def _dispatch_events(self, _):
+        """在中断外依次取出事件并调用监听器"""
+        self._ev_pending = False
+        while self._ev_tail != self._ev_head:
+            tail = self._ev_tail
+            kind = self._ev_kind[tail]
+            value = self._ev_value[tail]
+            delta = self._ev_delta[tail]
+            t = self._ev_time[tail]
+            seq = self._ev_seqs[tail]
+            tail += 1
+            self._ev_tail = 0 if tail == self._ev_size else tail
+            self._dispatch_event(kind, value, delta, t, seq)
+
+    def _dispatch_event(self, kind, value, delta, t, seq):
+        rotary_id = self._rotary_id
         try:
-            if old_value != self._value and len(self._listener) != 0:
-                _trigger(self, self._rotary_id, self.value(), self.direction())
-                
-            if old_value != self._value and 'change_callback_func' in dir(self):
-                self.change_callback_func(self._rotary_id, self.value(), self.direction())
+            if len(self._event_listener) != 0:
+                for listener in self._event_listener:
+                    listener(rotary_id, kind, value, delta, t, seq)
+            if kind == _EV_CHANGE:
+                if self._map is not None:
+                    value = self._mapped(value)
+                if len(self._listener) != 0:
+                    _trigger(self, rotary_id, value, delta)
+                if self.change_callback_func is not None:
+                    self.change_callback_func(rotary_id, value, delta)
+            elif kind == _EV_BUTTON:
+                if len(self._button_listener) != 0:
+                    _trigger_button(self, rotary_id, value, delta)
+                if self.click_callback_func is not None:
+                    self.click_callback_func(rotary_id, value, delta)
+            elif kind == _EV_DBCLICK:
+                if len(self._dbclick_listener) != 0:
+                    _trigger_dbclick(self, rotary_id)
+                if self.dbclick_callback_func is not None:
+                    self.dbclick_callback_func(rotary_id)
+            elif kind == _EV_COUNTER:
+                if len(self._counter_listener) != 0:
+                    _trigger_counter(self, rotary_id, value)
+                if self.counter_callback_func is not None:
+                    self.counter_callback_func(rotary_id, value)
+            elif kind == _EV_LONG:
+                if len(self._long_listener) != 0:
+                    _trigger_long(self, rotary_id, value)
+                if self.long_press_callback_func is not None:
+                    self.long_press_callback_func(rotary_id, value)
+            elif kind == _EV_REPEAT:
+                if len(self._repeat_listener) != 0:
+                    _trigger_repeat(self, rotary_id, value)
+                if self.repeat_callback_func is not None:
+                    self.repeat_callback_func(rotary_id, value)
         except:
-            pass
-        
-    def change(self, func):
+            if self._stats is not None and self._stats[_ST_ERRORS] < _ST_LIMIT:
+                self._stats[_ST_ERRORS] += 1
+
+    def change(self, func=None, max_hz=0):
         """
-        编码器数值改变回调,@rotary.change
+        编码器数值改变回调,@rotary.change 或 @rotary.change(max_hz=30) 限制调用频率
         """
-        self.change_callback_func = func
+        if func is None:
+            return lambda func: self.change(func, max_hz)
+        if getattr(self.change_callback_func, 'listener', None) is not None:
+            self.change_callback_func.close()
+        self.change_callback_func = _throttle(func, max_hz)
+        return func
         
     def _process_button_pins(self, pin):
-        """处理编码器按钮"""
+        """处理编码器按钮,只在按下和释放时启动单次定时器,按钮不动时没有任何唤醒"""
+        if self._cap_sample is not None:
+            btn_value = self._hal_get_btn_value()
+            self._capture(self._cap_pins | _CAPTURE_BTN_EDGE | (_CAPTURE_BTN if btn_value else 0))
+
+        if self._btn_glitch_us:
+            now = utime.ticks_us()
+            if 0 <= utime.ticks_diff(now, self._btn_edge_us) < self._btn_glitch_us:
+                self._glitch_count += 1
+                return
+            self._btn_edge_us = now
+
+        if self._cap_sample is None:
+            btn_value = self._hal_get_btn_value()
+
         old_value = self._btn_value
-        self._btn_value = self._hal_get_btn_value()
-        
-        try:
-            if old_value != self._btn_value:
-                if self._btn_value == BUTTON_PRESS: #按下
-                    self._btn_press_time = utime.ticks_ms() #按下的时间
-                    self._btn_press_count = self._btn_press_count + 1 #按下计数器累加
-                    
-                    if len(self._button_listener) != 0:
-                        _trigger_button(self, self._rotary_id, BUTTON_PRESS, 0)
-                        
-                    if 'click_callback_func' in dir(self):
-                        self.click_callback_func(self._rotary_id, BUTTON_PRESS, 0)
-                        
-                elif self._btn_value == BUTTON_RELEASE: #释放
-                    diff_time = utime.ticks_ms() - self._btn_press_time
-                    
-                    if len(self._button_listener) != 0:
-                        _trigger_button(self, self._rotary_id, BUTTON_RELEASE, diff_time)
-                    
-                    if 'click_callback_func' in dir(self):
-                        self.click_callback_func(self._rotary_id, BUTTON_RELEASE, diff_time)
-                else:
-                    print('按钮: 未知')
-        except:
-            pass
+        self._btn_value = btn_value
         
-        #print('_process_button_pins -> None')
+        if old_value != self._btn_value:
+            now = utime.ticks_ms()
+            if self._btn_value == self.BUTTON_PRESS: #按下
+                self._btn_press_time = now #按下的时间
+                self._post_event(_EV_BUTTON, self.BUTTON_PRESS, 0)
+                if self._button is not None:
+                    self._button.press()
+
+            elif self._btn_value == self.BUTTON_RELEASE: #释放
+                diff_time = utime.ticks_diff(now, self._btn_press_time)
+                self._post_event(_EV_BUTTON, self.BUTTON_RELEASE, diff_time)
+                if self._button is not None:
+                    self._button.release(diff_time)
         
     def click(self, func):
         """
         编码器按键单击,在方法上添加@rotary.click
         """
         self.click_callback_func = func
-        
-    def _process_counter_timer(self, t):
-        """处理编码器按键连续按下计数器"""
-        try:
-            if self._btn_press_count > 1 and (utime.ticks_ms() - self._btn_press_time) >= 250:
-                if self._btn_press_count > 2 and len(self._counter_listener) != 0:
-                    _trigger_counter(self, self._rotary_id, self._btn_press_count)
-                    
-                if self._btn_press_count > 2 and 'counter_callback_func' in dir(self):
-                    self.counter_callback_func(self._rotary_id, self._btn_press_count)
-                
-                if self._btn_press_count == 2 and len(self._dbclick_listener) != 0:
-                    _trigger_dbclick(self, self._rotary_id)
-                    
-                if self._btn_press_count == 2 and 'dbclick_callback_func' in dir(self):
-                    self.dbclick_callback_func(self._rotary_id)
-                
-                self._btn_press_count = 0
-        except:
-            pass
-        
-        # 如果计数一次,并且两次按键时间大于200毫秒,将不做连续按键处理
-        if self._btn_press_count == 1 and (utime.ticks_ms() - self._btn_press_time) >= 230:
-            self._btn_press_count = 0
-        
+
+    def _process_button_timer(self, t):
+        """按钮单次定时器:连击窗口结束、长按或长按重复"""
+        if self._button is not None:
+            self._button.timer()
+
     def counter(self, func):
         """
         编码器按键连续按下计数器@rotary.counter
         """
+        self._enable_button_timing()
         self.counter_callback_func = func
     
     def dbclick(self, func):
         """
         编码器按键双击,在方法上添加@rotary.dbclick
         """
+        self._enable_button_timing()
         self.dbclick_callback_func = func
+
+    def long_press(self, func):
+        """
+        编码器按键长按,@rotary.long_press,回调参数 (rotary_id, 按下时长ms)
+        """
+        self._enable_button_timing()
+        self.long_press_callback_func = func
+
+    def repeat(self, func):
+        """
+        编码器按键长按后重复触发,@rotary.repeat,回调参数 (rotary_id, 重复次数)
+        """
+        self._enable_button_timing()
+        self.repeat_callback_func = func
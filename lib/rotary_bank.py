@@ -0,0 +1,298 @@
+# Copyright (c) 2023 GeekerBear
+# Multi-encoder implementation sharing one IRQ handler (ESP8266/ESP32/rp2)
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+多个编码器共用一个中断处理函数。每次中断只读取一次 GPIO 输入寄存器,
+再对引脚电平发生变化的编码器逐个解码。每个编码器的状态保存在紧凑数组中,
+bank.add() 返回的对象提供与 Rotary 相同的 value()/set()/监听器接口
+
+    bank = RotaryBank(size=6)
+    r1 = bank.add(pin_num_clk=2, pin_num_dt=3, max_val=100, range_mode=RotaryBank.RANGE_BOUNDED)
+    r2 = bank.add(pin_num_clk=4, pin_num_dt=5)
+
+    @r1.change
+    def on_change(rotary_id, value, direction):
+        ...
+
+监听器在 micropython.schedule 中调用,同一次调度内多次变化只通知最新值。
+输入寄存器按 os.uname().machine 中的芯片型号选择,只支持 ESP32、ESP8266、RP2040 和 RP2350;
+其他芯片(包括 ESP32-S2/S3/C3 等寄存器地址不同的型号)逐个读取引脚,
+也可以通过 in_reg 指定输入寄存器地址(GPIO0-29)
+"""
+
+import machine
+import micropython
+import os
+from array import array
+from micropython import const
+from rotary import Rotary, _select_table, _next_state, _wrap, _bound
+from rotary_irq import _check_irq_pins, _pin, _irq
+
+_DIR_CW = const(0x10)
+_DIR_CCW = const(0x20)
+_DIR_MASK = const(0x30)
+
+# GPIO 输入寄存器: (os.uname().machine 的结尾, 地址, 可从寄存器读取的最大 GPIO)。
+# sys.platform 在 ESP32-S2/S3/C3 上也是 'esp32',读错地址会使芯片复位,因此按芯片型号匹配
+_GPIO_IN_REG = (
+    ('with ESP32', 0x3ff4403c, 29),     # GPIO_IN_REG
+    ('with ESP8266', 0x60000318, 15),   # GPIO_IN,GPIO16 在 RTC 寄存器中
+    ('with RP2040', 0xd0000004, 29),    # SIO GPIO_IN
+    ('with RP2350', 0xd0000004, 29),    # SIO GPIO_IN
+)
+_MAX_REG_PIN = const(29)
+# 逐个读取引脚时,第 i 个编码器的 CLK/DT 放在合成端口字的第 2i/2i+1 位,
+# 最多 15 个编码器,端口字保持在小整数范围内,中断中不分配内存
+_MAX_FALLBACK = const(15)
+
+
+def _find_in_reg(chip):
+    for suffix, address, max_pin in _GPIO_IN_REG:
+        if chip.endswith(suffix):
+            return address, max_pin
+    return None, 0
+
+
+class BankRotary(object):
+    """RotaryBank 中的一个编码器"""
+
+    def __init__(self, bank, index):
+        self._bank = bank
+        self._index = index
+
+    def value(self):
+        """当前值"""
+        return self._bank._value[self._index]
+
+    def direction(self):
+        """旋钮方向"""
+        return self._bank._direction[self._index]
+
+    def set(self, value=None, min_val=None, incr=None,
+            max_val=None, reverse=None, range_mode=None):
+        """设置参数"""
+        bank = self._bank
+        i = self._index
+        state = machine.disable_irq()
+        if value is not None:
+            bank._value[i] = value
+        if min_val is not None:
+            bank._min_val[i] = min_val
+        if max_val is not None:
+            bank._max_val[i] = max_val
+        if incr is not None:
+            bank._incr[i] = incr
+        if reverse is not None:
+            bank._reverse[i] = -1 if reverse else 1
+        if range_mode is not None:
+            bank._range_mode[i] = range_mode
+        machine.enable_irq(state)
+
+    def reset(self):
+        """重置当前值"""
+        self._bank._value[self._index] = 0
+
+    def add_listener(self, l):
+        self._bank._listener[self._index].append(l)
+
+    def remove_listener(self, l):
+        listener = self._bank._listener[self._index]
+        if l not in listener:
+            raise ValueError('{} is not an installed listener'.format(l))
+        listener.remove(l)
+
+    def change(self, func):
+        """
+        编码器数值改变回调,@rotary.change
+        """
+        self._bank._listener[self._index].append(func)
+
+
+class RotaryBank(object):
+
+    RANGE_UNBOUNDED = Rotary.RANGE_UNBOUNDED
+    RANGE_WRAP = Rotary.RANGE_WRAP
+    RANGE_BOUNDED = Rotary.RANGE_BOUNDED
+
+    def __init__(self, size=8, pull_up=True, half_step=False, invert=False, hard=False, in_reg=None,
+                 quarter_step=False):
+        _check_irq_pins((), hard)
+        self._size = size
+        self._count = 0
+        self._pull_up = pull_up
+        self._hard = hard
+        self._invert = invert
+        self._quarter_step = quarter_step
+        self._table = _select_table(half_step, invert, quarter_step)
+        if in_reg is not None:
+            self._in_reg, self._max_reg_pin = in_reg, _MAX_REG_PIN
+        else:
+            self._in_reg, self._max_reg_pin = _find_in_reg(os.uname().machine)
+
+        self._pins = []
+        self._pin_nums = bytearray(2 * size)
+        self._bits = bytearray(2 * size)
+        self._mask = array('I', bytes(4 * size))
+        self._state = bytearray(size)
+        self._value = array('i', bytes(4 * size))
+        self._direction = array('i', bytes(4 * size))
+        self._min_val = array('i', bytes(4 * size))
+        self._max_val = array('i', bytes(4 * size))
+        self._incr = array('i', bytes(4 * size))
+        self._reverse = array('b', bytes(size))
+        self._range_mode = bytearray(size)
+        self._rotary_id = array('i', bytes(4 * size))
+        self._listener = []
+        self._rotary = []
+
+        self._port = 0
+        self._pending = 0
+        self._scheduled = False
+        self._irq_ref = self._process_port
+        self._dispatch_ref = self._dispatch
+
+    def add(self, pin_num_clk, pin_num_dt, min_val=0, max_val=10, incr=1,
+            reverse=False, range_mode=Rotary.RANGE_UNBOUNDED, rotary_id=None):
+        """
+        添加一个编码器,返回 BankRotary。
+        引脚不在输入寄存器中(如 ESP32 的 GPIO34-39)时所有编码器退回逐个读取引脚,
+        此时最多 15 个编码器
+        """
+        i = self._count
+        if i == self._size:
+            raise ValueError('RotaryBank is full: %d encoders' % self._size)
+
+        _check_irq_pins((pin_num_clk, pin_num_dt), self._hard)
+        pin_clk = _pin(pin_num_clk, self._pull_up)
+        pin_dt = _pin(pin_num_dt, self._pull_up)
+
+        if self._in_reg is not None and max(pin_num_clk, pin_num_dt) > self._max_reg_pin:
+            self._in_reg = None
+            # 已添加的编码器也改用合成端口字中的位置
+            for k in range(i):
+                self._assign_bits(k)
+        if self._in_reg is None and i >= _MAX_FALLBACK:
+            raise ValueError('RotaryBank: at most %d encoders without a GPIO input register' % _MAX_FALLBACK)
+
+        self._pins.append(pin_clk)
+        self._pins.append(pin_dt)
+        self._pin_nums[2 * i] = pin_num_clk
+        self._pin_nums[2 * i + 1] = pin_num_dt
+        self._assign_bits(i)
+        self._value[i] = min_val
+        self._min_val[i] = min_val
+        self._max_val[i] = max_val
+        self._incr[i] = incr
+        self._reverse[i] = -1 if reverse else 1
+        self._range_mode[i] = range_mode
+        self._rotary_id[i] = i if rotary_id is None else rotary_id
+        self._listener.append([])
+        self._rotary.append(BankRotary(self, i))
+        self._count = i + 1
+
+        state = machine.disable_irq()
+        self._port = self._read_port()
+        if self._quarter_step:
+            # 四倍频的状态就是当前逻辑电平
+            pins = (pin_clk.value() << 1) | pin_dt.value()
+            self._state[i] = pins ^ 0x03 if self._invert else pins
+        machine.enable_irq(state)
+
+        _irq(pin_clk, self._irq_ref, self._hard)
+        _irq(pin_dt, self._irq_ref, self._hard)
+        return self._rotary[i]
+
+    def __getitem__(self, index):
+        return self._rotary[index]
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        """关闭所有编码器中断"""
+        for pin in self._pins:
+            pin.irq(handler=None)
+
+    def _assign_bits(self, i):
+        # 读寄存器时位置就是 GPIO 编号,逐个读取引脚时为合成端口字的第 2i/2i+1 位
+        if self._in_reg is None:
+            self._bits[2 * i] = 2 * i
+            self._bits[2 * i + 1] = 2 * i + 1
+        else:
+            self._bits[2 * i] = self._pin_nums[2 * i]
+            self._bits[2 * i + 1] = self._pin_nums[2 * i + 1]
+        self._mask[i] = (1 << self._bits[2 * i]) | (1 << self._bits[2 * i + 1])
+
+    def _read_port(self):
+        if self._in_reg is not None:
+            return machine.mem32[self._in_reg]
+        port = 0
+        pins = self._pins
+        for k in range(2 * self._count):
+            if pins[k].value():
+                port |= 1 << k
+        return port
+
+    def _process_port(self, pin):
+        """所有编码器共用的中断处理函数"""
+        port = self._read_port()
+        changed = port ^ self._port
+        if not changed:
+            return
+        self._port = port
+
+        for i in range(self._count):
+            if not changed & self._mask[i]:
+                continue
+
+            clk_dt_pins = (((port >> self._bits[2 * i]) & 1) << 1) | ((port >> self._bits[2 * i + 1]) & 1)
+            state = _next_state(self._table, self._state[i], clk_dt_pins)
+            self._state[i] = state
+            direction = state & _DIR_MASK
+            if not direction:
+                continue
+
+            incr = self._incr[i] if direction == _DIR_CW else -self._incr[i]
+            incr *= self._reverse[i]
+
+            old_value = self._value[i]
+            range_mode = self._range_mode[i]
+            if range_mode == Rotary.RANGE_WRAP:
+                value = _wrap(old_value, incr, self._min_val[i], self._max_val[i])
+            elif range_mode == Rotary.RANGE_BOUNDED:
+                value = _bound(old_value, incr, self._min_val[i], self._max_val[i])
+            else:
+                value = old_value + incr
+            self._value[i] = value
+            self._direction[i] = incr
+
+            if value != old_value:
+                self._pending |= 1 << i
+
+        if self._pending and not self._scheduled:
+            self._scheduled = True
+            try:
+                micropython.schedule(self._dispatch_ref, None)
+            except RuntimeError:
+                self._scheduled = False
+
+    def _dispatch(self, _):
+        """在中断外通知有变化的编码器"""
+        state = machine.disable_irq()
+        pending = self._pending
+        self._pending = 0
+        self._scheduled = False
+        machine.enable_irq(state)
+
+        i = 0
+        while pending:
+            if pending & 1:
+                try:
+                    for listener in self._listener[i]:
+                        listener(self._rotary_id[i], self._value[i], self._direction[i])
+                except:
+                    pass
+            pending >>= 1
+            i += 1
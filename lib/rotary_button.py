@@ -0,0 +1,77 @@
+# Copyright (c) 2023 GeekerBear
+# Multi-click, long-press and repeat timing for the rotary encoder button
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+连击、长按和长按重复的计时。只有注册了双击/连击计数/长按/重复回调,
+或构造时设置了 long_ms/repeat_ms 时,Rotary 才导入本模块并创建 ButtonTiming,
+只用旋转和按下/释放事件的程序不占用这部分 RAM
+"""
+
+import utime
+from micropython import const
+
+_EV_DBCLICK = const(2)
+_EV_COUNTER = const(3)
+_EV_LONG = const(4)
+_EV_REPEAT = const(5)
+_BUTTON_RELEASE = const(1)
+
+
+class ButtonTiming(object):
+
+    def __init__(self, rotary):
+        self._rotary = rotary
+        self._press_count = 0
+        self._long_fired = False
+        self._repeat_count = 0
+
+    def press(self):
+        """按下,在中断中调用"""
+        rotary = self._rotary
+        self._press_count += 1
+        self._long_fired = False
+        if rotary._long_ms:
+            rotary._hal_arm_timer(rotary._long_ms)
+
+    def release(self, held):
+        """释放,held 为按下时长(ms),在中断中调用"""
+        rotary = self._rotary
+        if self._long_fired:
+            # 长按后不再计入连击
+            self._press_count = 0
+            rotary._hal_cancel_timer()
+        elif held >= rotary._click_ms:
+            self._finish_clicks()
+        else:
+            rotary._hal_arm_timer(rotary._click_ms - held)
+
+    def _finish_clicks(self):
+        """连击窗口结束,按次数触发双击或连续按下事件"""
+        if self._press_count > 2:
+            self._rotary._post_event(_EV_COUNTER, self._press_count, 0)
+        elif self._press_count == 2:
+            self._rotary._post_event(_EV_DBCLICK, 0, 0)
+        self._press_count = 0
+
+    def timer(self):
+        """按钮单次定时器:连击窗口结束、长按或长按重复"""
+        rotary = self._rotary
+        if rotary._btn_value == _BUTTON_RELEASE:
+            self._finish_clicks()
+            return
+
+        held = utime.ticks_diff(utime.ticks_ms(), rotary._btn_press_time)
+        if not self._long_fired:
+            if rotary._long_ms and held >= rotary._long_ms:
+                self._long_fired = True
+                self._press_count = 0
+                self._repeat_count = 0
+                rotary._post_event(_EV_LONG, held, 0)
+                if rotary._repeat_ms:
+                    rotary._hal_arm_timer(rotary._repeat_ms)
+        elif rotary._repeat_ms:
+            self._repeat_count += 1
+            rotary._post_event(_EV_REPEAT, self._repeat_count, 0)
+            rotary._hal_arm_timer(rotary._repeat_ms)
@@ -0,0 +1,176 @@
+# Copyright (c) 2023 GeekerBear
+# Generic machine.Pin implementation (ESP8266/ESP32/rp2/pyboard)
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+所有端口共用的引脚中断实现,端口之间的差异记录在 _PORTS 表中。
+rotary_irq_esp/rotary_irq_rp2/rotary_irq_pyb 只是保留旧导入路径的别名
+
+    from rotary_irq import RotaryIRQ
+    rotary = RotaryIRQ(pin_num_clk=12, pin_num_dt=13, pin_num_btn=14)
+
+未列出的端口按通用 machine.Pin 处理,不使用硬中断
+"""
+
+from machine import Pin, Timer
+from rotary import Rotary
+import rotary_timer
+from sys import platform
+
+# 端口: (支持 hard=True, 不支持中断的引脚, 没有内部上拉的引脚, 供电引脚)
+# pyboard D 需要打开 EN_3V3 给编码器供电,其他 pyboard 没有该引脚
+_PORTS = {
+    'esp8266': (True, (16,), (16,), None),
+    'esp32': (True, (), (), None),
+    'rp2': (True, (), (), None),
+    'pyboard': (True, (), (), 'EN_3V3'),
+}
+_GENERIC_PORT = (False, (), (), None)
+_PORT = _PORTS.get(platform, _GENERIC_PORT)
+
+_TRIGGER = Pin.IRQ_RISING | Pin.IRQ_FALLING
+
+
+# 以下函数供 RotaryIRQ、RotaryPoll 和 RotaryBank 共用
+def _check_irq_pins(pin_nums, hard):
+    """检查引脚是否支持中断、端口是否支持硬中断"""
+    deny_pins = _PORT[1]
+    for pin_num in pin_nums:
+        if pin_num in deny_pins:
+            raise ValueError(
+                '%s: Pin %d not allowed. Not Available for Interrupt: %s' %
+                (platform, pin_num, deny_pins))
+    if hard and not _PORT[0]:
+        raise ValueError('%s: hard IRQ is not supported' % platform)
+
+
+def _pin(pin_num, pull_up):
+    """输入引脚;没有内部上拉的引脚(ESP8266 的 GPIO16)忽略 pull_up,需要外接上拉电阻"""
+    pull = Pin.PULL_UP if pull_up and pin_num not in _PORT[2] else None
+    return Pin(pin_num, Pin.IN, pull)
+
+
+def _irq(pin, handler, hard):
+    # 不支持硬中断的端口不接受 hard 参数
+    if _PORT[0]:
+        pin.irq(handler=handler, trigger=_TRIGGER, hard=hard)
+    else:
+        pin.irq(handler=handler, trigger=_TRIGGER)
+
+
+def _power_on():
+    if _PORT[3] is not None:
+        try:
+            Pin(_PORT[3], Pin.OUT).value(1)
+        except ValueError:
+            pass
+
+
+class RotaryIRQ(Rotary):
+
+    def __init__(
+        self,
+        pin_num_clk,
+        pin_num_dt,
+        pin_num_btn,
+        min_val=0,
+        max_val=10,
+        incr=1,
+        reverse=False,
+        range_mode=Rotary.RANGE_UNBOUNDED,
+        pull_up=True,
+        half_step=False,
+        invert=False,
+        rotary_id = 0,
+        hard=False,
+        event_queue=8,
+        accel=None,
+        storm_hz=0,
+        poll_hz=1000,
+        click_ms=250,
+        long_ms=0,
+        repeat_ms=0,
+        stats=False,
+        capture=0,
+        glitch_us=0,
+        btn_glitch_us=0,
+        resync=False,
+        velocity_window=4,
+        quarter_step=False,
+        mapping=None,
+        poll_timer_id=None
+    ):
+        _check_irq_pins((pin_num_clk, pin_num_dt, pin_num_btn), hard)
+        # event_queue=0 时监听器直接在中断中调用,硬中断里不能分配内存
+        if hard and not event_queue:
+            raise ValueError('hard=True requires event_queue > 0')
+
+        self._pin_clk = _pin(pin_num_clk, pull_up)
+        self._pin_dt = _pin(pin_num_dt, pull_up)
+        self._pin_btn = _pin(pin_num_btn, pull_up)
+
+        # 直接绑定 Pin.value,边沿处理中少一层 Python 方法调用
+        self._hal_get_clk_value = self._pin_clk.value
+        self._hal_get_dt_value = self._pin_dt.value
+        self._hal_get_btn_value = self._pin_btn.value
+        _power_on()
+
+        super().__init__(min_val, max_val, incr, reverse, range_mode, half_step, invert, rotary_id, self._pin_btn.value(),
+                         event_queue, accel, click_ms, long_ms, repeat_ms, stats, capture,
+                         glitch_us, btn_glitch_us, resync, velocity_window, quarter_step, mapping)
+        # hard=True 时引脚中断以硬中断方式运行,边沿处理不分配堆内存
+        self._hard = hard
+        self._rotary_irq_ref = self._process_rotary_pins
+        self._button_irq_ref = self._process_button_pins
+
+        # storm_hz 大于0时,边沿速率超过该值(次/秒)临时改为 poll_hz 定时采样,空闲后恢复中断。
+        # 采样定时器由 rotary_timer.claim() 分配,poll_timer_id 为 None 时自动选择
+        self._poll_timer_id = None
+        if storm_hz:
+            self._poll_timer_id, self._poll_timer = rotary_timer.claim(poll_timer_id)
+            self._init_polling(poll_hz, 0, 200, storm_hz)
+
+        # 按钮计时使用所有编码器共用的 rotary_timer,只在按下或释放后启动
+        self._timer_slot = rotary_timer.register(self._button_timer_ref)
+        self._hal_enable_irq()
+
+    def _hal_arm_timer(self, ms):
+        # 软中断中可以直接设置定时器;硬中断和轮询的定时器回调中交给 micropython.schedule
+        rotary_timer.arm(self._timer_slot, ms, self._hard or self._polling)
+
+    def _dispatch_events(self, _):
+        # 补上硬中断中因调度队列已满而没有完成的定时器设置
+        rotary_timer.service()
+        super()._dispatch_events(_)
+
+    def _hal_cancel_timer(self):
+        rotary_timer.cancel(self._timer_slot)
+
+    def _hal_enable_irq(self):
+        _irq(self._pin_clk, self._rotary_irq_ref, self._hard)
+        _irq(self._pin_dt, self._rotary_irq_ref, self._hard)
+        _irq(self._pin_btn, self._button_irq_ref, self._hard)
+
+    def _hal_disable_irq(self):
+        self._pin_clk.irq(handler=None)
+        self._pin_dt.irq(handler=None)
+        self._pin_btn.irq(handler=None)
+
+    # 中断风暴时切换到轮询,按钮也由轮询采样
+    _hal_enable_pin_irq = _hal_enable_irq
+    _hal_disable_pin_irq = _hal_disable_irq
+
+    def _hal_poll_start(self, hz, callback):
+        self._poll_timer.init(period=max(1, 1000 // hz), mode=Timer.PERIODIC, callback=callback)
+
+    def _hal_poll_stop(self):
+        self._poll_timer.deinit()
+
+    def _hal_close(self):
+        if self._polling:
+            self._hal_poll_stop()
+        self._hal_disable_irq()
+        if self._poll_timer_id is not None:
+            rotary_timer.release(self._poll_timer_id)
+        rotary_timer.unregister(self._timer_slot)
@@ -0,0 +1,20 @@
+# Copyright (c) 2023 GeekerBear
+# Viper decode kernel for the rotary encoder state tables
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+viper 解码内核。@micropython.viper 在编译时处理,不支持 native 代码生成的端口
+(或 mpy-cross 未指定 -march)编译本模块会失败,因此单独成为一个模块:
+rotary 导入失败时退回纯 Python 实现,结果相同
+"""
+
+import micropython
+from micropython import const
+
+_STATE_MASK = const(0x07)
+
+
+@micropython.viper
+def next_state(table: ptr8, state: int, clk_dt_pins: int) -> int:
+    return table[((state & _STATE_MASK) << 2) | clk_dt_pins]
@@ -0,0 +1,90 @@
+# Copyright (c) 2023 GeekerBear
+# Precomputed nonlinear value mapping tables
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+把编码器的线性数值映射为对数、指数、dB 或自定义刻度。映射表在构造或 set() 时
+一次生成为紧凑的 array,事件和 mapped_value() 只做一次查表,不做浮点运算
+
+    # 20Hz-20kHz 对数刻度,共 max_val - min_val + 1 档
+    rotary = RotaryIRQ(..., min_val=0, max_val=100, range_mode=Rotary.RANGE_BOUNDED,
+                       mapping=('log', 20, 20000))
+    # -60dB..0dB 的线性增益,乘以 1000 存为整数
+    rotary = RotaryIRQ(..., mapping=('db', -60, 0, 1000))
+    # 自定义表,长度必须等于档数
+    rotary = RotaryIRQ(..., max_val=3, mapping=(10, 22, 47, 100))
+
+生成器规格:
+    ('log', lo, hi, scale=1)             等比刻度
+    ('exp', lo, hi, curve=4, scale=1)    指数曲线,curve 越大起始段越平缓
+    ('db', lo_db, hi_db, scale=1000)     dB 等分,输出线性幅度
+也可以传入函数 f(x),x 从 0 到 1,返回值按自定义表处理。
+生成器的结果乘以 scale 后取整存入 array('i'),整数读取不分配内存;
+自定义表含浮点数时存为 array('f'),读取时会分配浮点对象
+"""
+
+import math
+from array import array
+
+
+def _compact(values):
+    """所有值都是整数时用 array('i'),否则用 array('f')"""
+    for v in values:
+        if not isinstance(v, int):
+            return array('f', values)
+    return array('i', values)
+
+
+def _positions(steps):
+    if steps < 1:
+        raise ValueError('mapping needs at least one step')
+    if steps == 1:
+        return [0.0]
+    return [i / (steps - 1) for i in range(steps)]
+
+
+def log(steps, lo, hi, scale=1):
+    """从 lo 到 hi 的等比刻度,lo 和 hi 必须同号且不为0"""
+    if lo * hi <= 0:
+        raise ValueError('log mapping needs lo and hi of the same sign')
+    ratio = hi / lo
+    return array('i', [int(round(lo * ratio ** x * scale)) for x in _positions(steps)])
+
+
+def exp(steps, lo, hi, curve=4, scale=1):
+    """lo + (hi - lo) * (e^(curve*x) - 1) / (e^curve - 1)"""
+    if curve == 0:
+        raise ValueError('exp mapping needs a non-zero curve')
+    k = math.exp(curve) - 1
+    return array('i', [int(round((lo + (hi - lo) * (math.exp(curve * x) - 1) / k) * scale))
+                       for x in _positions(steps)])
+
+
+def db(steps, lo_db, hi_db, scale=1000):
+    """lo_db 到 hi_db 等分,输出线性幅度 10^(dB/20) * scale"""
+    return array('i', [int(round(10 ** ((lo_db + (hi_db - lo_db) * x) / 20) * scale))
+                       for x in _positions(steps)])
+
+
+_GENERATORS = {
+    'log': log,
+    'exp': exp,
+    'db': db,
+}
+
+
+def build(spec, steps):
+    """按规格生成 steps 档的映射表,见模块说明"""
+    if callable(spec):
+        return _compact([spec(x) for x in _positions(steps)])
+    if len(spec) and isinstance(spec[0], str):
+        generator = _GENERATORS.get(spec[0])
+        if generator is None:
+            raise ValueError('unknown mapping %r' % spec[0])
+        return generator(steps, *spec[1:])
+    if len(spec) != steps:
+        raise ValueError('mapping has %d entries, range needs %d' % (len(spec), steps))
+    if isinstance(spec, array):
+        return spec
+    return _compact(spec)
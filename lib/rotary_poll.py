@@ -0,0 +1,103 @@
+# Copyright (c) 2023 GeekerBear
+# Timer-sampled implementation for pins without interrupts (ESP8266/ESP32/rp2)
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+用定时器采样 CLK/DT/按钮,不使用引脚中断,可用于 ESP8266 的 GPIO16 等不支持中断的引脚,
+也可避免噪声引脚产生的中断风暴。转动时以 poll_hz 采样,空闲 idle_ms 后降到 idle_hz
+
+    rotary = RotaryPoll(pin_num_clk=16, pin_num_dt=14, pin_num_btn=12, poll_hz=1000, idle_hz=20)
+
+ESP8266 的 GPIO16 没有内部上拉,pull_up 对它无效,需要外接上拉电阻
+
+每个实例使用自己的采样定时器,poll_timer_id 为 None 时由 rotary_timer.claim() 分配
+(ESP32 取空闲的硬件定时器,其他端口用虚拟定时器)
+"""
+
+from machine import Timer
+from rotary import Rotary
+from rotary_irq import _pin
+import rotary_timer
+
+
+class RotaryPoll(Rotary):
+
+    def __init__(
+        self,
+        pin_num_clk,
+        pin_num_dt,
+        pin_num_btn,
+        min_val=0,
+        max_val=10,
+        incr=1,
+        reverse=False,
+        range_mode=Rotary.RANGE_UNBOUNDED,
+        pull_up=True,
+        half_step=False,
+        invert=False,
+        rotary_id = 0,
+        event_queue=8,
+        accel=None,
+        poll_hz=1000,
+        idle_hz=20,
+        idle_ms=500,
+        click_ms=250,
+        long_ms=0,
+        repeat_ms=0,
+        stats=False,
+        capture=0,
+        glitch_us=0,
+        btn_glitch_us=0,
+        resync=False,
+        velocity_window=4,
+        quarter_step=False,
+        mapping=None,
+        poll_timer_id=None
+    ):
+        self._pin_clk = _pin(pin_num_clk, pull_up)
+        self._pin_dt = _pin(pin_num_dt, pull_up)
+        self._pin_btn = _pin(pin_num_btn, pull_up)
+
+        # 直接绑定 Pin.value,采样中少一层 Python 方法调用
+        self._hal_get_clk_value = self._pin_clk.value
+        self._hal_get_dt_value = self._pin_dt.value
+        self._hal_get_btn_value = self._pin_btn.value
+
+        super().__init__(min_val, max_val, incr, reverse, range_mode, half_step, invert, rotary_id, self._pin_btn.value(),
+                         event_queue, accel, click_ms, long_ms, repeat_ms, stats, capture,
+                         glitch_us, btn_glitch_us, resync, velocity_window, quarter_step, mapping)
+
+        self._poll_timer_id, self._poll_timer = rotary_timer.claim(poll_timer_id)
+        self._timer_slot = rotary_timer.register(self._button_timer_ref)
+        self._init_polling(poll_hz, idle_hz, idle_ms)
+        self._hal_enable_irq()
+
+    def _hal_poll_start(self, hz, callback):
+        self._poll_timer.init(period=max(1, 1000 // hz), mode=Timer.PERIODIC, callback=callback)
+
+    def _hal_poll_stop(self):
+        self._poll_timer.deinit()
+
+    def _hal_arm_timer(self, ms):
+        rotary_timer.arm(self._timer_slot, ms)
+
+    def _dispatch_events(self, _):
+        # 补上采样回调中因调度队列已满而没有完成的定时器设置
+        rotary_timer.service()
+        super()._dispatch_events(_)
+
+    def _hal_cancel_timer(self):
+        rotary_timer.cancel(self._timer_slot)
+
+    def _hal_enable_irq(self):
+        self._start_polling(False)
+
+    def _hal_disable_irq(self):
+        self._hal_poll_stop()
+        self._polling = False
+
+    def _hal_close(self):
+        self._hal_disable_irq()
+        rotary_timer.release(self._poll_timer_id)
+        rotary_timer.unregister(self._timer_slot)
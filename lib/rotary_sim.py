@@ -0,0 +1,207 @@
+# Copyright (c) 2023 GeekerBear
+# Simulated implementation for host-side testing and benchmarking
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+无需硬件的仿真 HAL。引脚电平由程序写入,边沿直接送入 Rotary 的中断处理函数。
+可在 unix 端口 MicroPython 上运行;在 CPython 上运行时需把 host/ 加入 sys.path
+
+    from rotary_sim import SimRotary, Quadrature
+    r = SimRotary(max_val=100, range_mode=SimRotary.RANGE_BOUNDED)
+    q = Quadrature()
+    r.feed(q.turn(10, rate_hz=200))
+"""
+
+import struct
+import utime
+from rotary import Rotary, _CAPTURE_MAGIC, _CAPTURE_VERSION, _CAPTURE_HEADER
+
+# 顺时针旋转时逻辑 CLK/DT 电平的格雷码顺序(静止为 11)
+_CW_SEQUENCE = (0b10, 0b00, 0b01, 0b11)
+
+
+class SimRotary(Rotary):
+
+    def __init__(
+        self,
+        min_val=0,
+        max_val=10,
+        incr=1,
+        reverse=False,
+        range_mode=Rotary.RANGE_UNBOUNDED,
+        half_step=False,
+        invert=False,
+        rotary_id = 0,
+        event_queue=8,
+        accel=None,
+        click_ms=250,
+        long_ms=0,
+        repeat_ms=0,
+        stats=False,
+        capture=0,
+        glitch_us=0,
+        btn_glitch_us=0,
+        resync=False,
+        velocity_window=4,
+        quarter_step=False,
+        mapping=None
+    ):
+        self._clk = 0 if invert else 1
+        self._dt = 0 if invert else 1
+        self._btn = Rotary.BUTTON_RELEASE
+        self._timer_at_us = None
+        super().__init__(min_val, max_val, incr, reverse, range_mode, half_step, invert, rotary_id, self._btn,
+                         event_queue, accel, click_ms, long_ms, repeat_ms, stats, capture,
+                         glitch_us, btn_glitch_us, resync, velocity_window, quarter_step, mapping)
+
+    def edge(self, clk, dt):
+        """设置 CLK/DT 电平并触发一次编码器中断"""
+        self._clk = clk
+        self._dt = dt
+        self._process_rotary_pins(None)
+
+    def button(self, value):
+        """设置按钮电平并触发一次按钮中断"""
+        self._btn = value
+        self._process_button_pins(None)
+
+    def feed(self, edges):
+        """
+        依次送入 (t_us, clk, dt) 边沿。主机桩模块提供虚拟时钟时,按 t_us 推进时钟
+        """
+        virtual = hasattr(utime, 'set_ticks_us')
+        for t, clk, dt in edges:
+            if virtual:
+                self.run_until(t)
+            self.edge(clk, dt)
+
+    def run_until(self, t_us):
+        """推进虚拟时钟到 t_us,期间到期的按钮定时器依次触发(需要 host/utime.py)"""
+        while self._timer_at_us is not None and self._timer_at_us <= t_us:
+            utime.set_ticks_us(self._timer_at_us)
+            self._timer_at_us = None
+            self._process_button_timer(None)
+        utime.set_ticks_us(t_us)
+
+    def _hal_get_clk_value(self):
+        return self._clk
+
+    def _hal_get_dt_value(self):
+        return self._dt
+
+    def _hal_get_btn_value(self):
+        return self._btn
+
+    def _hal_arm_timer(self, ms):
+        self._timer_at_us = utime.ticks_us() + ms * 1000
+
+    def _hal_cancel_timer(self):
+        self._timer_at_us = None
+
+    def _hal_enable_irq(self):
+        pass
+
+    def _hal_disable_irq(self):
+        pass
+
+    def _hal_close(self):
+        pass
+
+
+def load_capture(path):
+    """
+    读取 Rotary.dump_capture() 写入的文件,
+    返回 (half_step, invert, quarter_step, start, [(t_us, sample), ...]),start 为第一条记录之前的电平。
+    版本 1 的文件没有记录起始电平,按编码器静止、按钮释放处理
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, flags, count = struct.unpack_from('<4sBBI', data, 0)
+    if magic != _CAPTURE_MAGIC or not 1 <= version <= _CAPTURE_VERSION:
+        raise ValueError('%s is not a rotary capture file' % path)
+    if version == 1:
+        start = (0 if flags & 2 else 0x03) | 0x04
+        offset = struct.calcsize('<4sBBI')
+    else:
+        start = struct.unpack_from(_CAPTURE_HEADER, data, 0)[4]
+        offset = struct.calcsize(_CAPTURE_HEADER)
+    records = []
+    for i in range(count):
+        records.append(struct.unpack_from('<IB', data, offset + 5 * i))
+    return bool(flags & 1), bool(flags & 2), bool(flags & 4), start, records
+
+
+def replay_capture(path, rotary=None, **kwargs):
+    """
+    把现场记录的采样重新送入解码器,用于比较不同的解码参数。
+    未指定 rotary 时按文件中的 half_step/invert/quarter_step 新建 SimRotary,kwargs 传给构造函数。
+    解码从文件中的起始电平开始;环形缓冲区覆盖过旧记录时起始电平可能不在定位点上,
+    第一个定位点的计数可能不准
+    """
+    half_step, invert, quarter_step, start, records = load_capture(path)
+    if rotary is None:
+        rotary = SimRotary(half_step=half_step, invert=invert, quarter_step=quarter_step, **kwargs)
+    rotary._clk = (start >> 1) & 1
+    rotary._dt = start & 1
+    rotary._btn = (start >> 2) & 1
+    rotary._last_pins = start & 0x03
+    rotary._cap_pins = start & 0x03
+    rotary._btn_value = rotary._btn
+    rotary._state = rotary._start_state()
+    virtual = hasattr(utime, 'set_ticks_us')
+    if records and virtual:
+        # 采样时间从 0 开始,避免 ticks 回绕
+        t_start = records[0][0]
+    for t, sample in records:
+        if virtual:
+            rotary.run_until((t - t_start) & 0x3fffffff)
+        rotary._clk = (sample >> 1) & 1
+        rotary._dt = sample & 1
+        rotary._btn = (sample >> 2) & 1
+        if sample & 0x08:
+            rotary._process_button_pins(None)
+        else:
+            rotary._process_rotary_pins(None)
+    return rotary
+
+
+class Quadrature(object):
+    """
+    正交波形发生器,按给定转速生成 (t_us, clk, dt) 边沿序列,可叠加抖动
+    """
+
+    def __init__(self, half_step=False, invert=False, t_us=0, quarter_step=False):
+        # half_step  半步编码器每个定位点 2 个边沿,全步为 4 个;quarter_step 每个边沿即一个计数
+        self._edges_per_detent = 1 if quarter_step else 2 if half_step else 4
+        self._invert = 0b11 if invert else 0
+        self._phase = 3
+        self.t_us = t_us
+
+    def turn(self, detents, rate_hz=100, bounce=0, bounce_us=5, drop=0):
+        """
+        生成 detents 个定位点的边沿,正数为顺时针,负数为逆时针。
+        rate_hz 为每秒定位点数;bounce 为每个边沿后附加的抖动次数;
+        drop 大于0时每 drop 个边沿丢掉一个,模拟中断来不及处理
+        """
+        step = 1 if detents > 0 else -1
+        interval = 1000000 // (rate_hz * self._edges_per_detent) or 1
+        for n in range(abs(detents) * self._edges_per_detent):
+            self.t_us += interval
+            prev = _CW_SEQUENCE[self._phase] ^ self._invert
+            self._phase = (self._phase + step) & 3
+            pins = _CW_SEQUENCE[self._phase] ^ self._invert
+            t = self.t_us
+            if drop and n % drop == drop - 1:
+                continue
+            for _ in range(bounce):
+                yield t, pins >> 1, pins & 1
+                t += bounce_us
+                yield t, prev >> 1, prev & 1
+                t += bounce_us
+            yield t, pins >> 1, pins & 1
+            self.t_us = t
+
+    def idle(self, us):
+        """推进时间而不产生边沿"""
+        self.t_us += us
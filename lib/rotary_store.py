@@ -0,0 +1,122 @@
+# Copyright (c) 2023 GeekerBear
+# Write-coalescing persistent position store
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+保存编码器数值,重启后恢复。数值变化时只标记为脏,停止转动 quiet_ms 后
+(或持续转动时每隔 max_ms)才写入一次。记录在文件的 slots 个槽位中轮流写入,分散 flash 磨损
+
+    rotary = RotaryIRQ(...)
+    store = RotaryStore(rotary, 'volume.dat')   # 构造时恢复上次保存的值
+    asyncio.create_task(store.run())            # 或在主循环中调用 store.service()
+
+记录格式 '<BIiB': 标记 0xA5, 序号, 数值, 校验
+"""
+
+import struct
+import utime
+from micropython import const
+
+_RECORD = '<BIiB'
+_RECORD_SIZE = const(10)
+_MAGIC = const(0xA5)
+
+
+def _checksum(buf):
+    return (sum(buf[:_RECORD_SIZE - 1]) & 0xFF) ^ 0xFF
+
+
+class RotaryStore(object):
+
+    def __init__(self, rotary, path='rotary.dat', slots=8, quiet_ms=1000, max_ms=10000, restore=True):
+        self._rotary = rotary
+        self._path = path
+        self._slots = slots
+        self._quiet_ms = quiet_ms
+        self._max_ms = max_ms
+        self._buf = bytearray(_RECORD_SIZE)
+        self._dirty = False
+        self._value = 0
+        self._first_change = 0
+        self._last_change = 0
+
+        self._seq, value = self._load()
+        if restore and value is not None:
+            rotary.set(value=value)
+        rotary.add_listener(self._on_change)
+
+    def _load(self):
+        """读取所有槽位,返回 (最大序号, 对应的数值),没有有效记录时数值为 None"""
+        size = self._slots * _RECORD_SIZE
+        try:
+            with open(self._path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            data = b''
+        if len(data) < size:
+            # 新建或补齐文件,之后只做原位写入
+            with open(self._path, 'wb') as f:
+                f.write(data + bytes(size - len(data)))
+
+        seq = 0
+        value = None
+        for i in range(min(self._slots, len(data) // _RECORD_SIZE)):
+            record = data[i * _RECORD_SIZE:(i + 1) * _RECORD_SIZE]
+            magic, record_seq, record_value, check = struct.unpack(_RECORD, record)
+            if magic == _MAGIC and check == _checksum(record) and (value is None or record_seq > seq):
+                seq = record_seq
+                value = record_value
+        return seq, value
+
+    def _on_change(self, rotary_id, value, direction):
+        now = utime.ticks_ms()
+        if not self._dirty:
+            self._dirty = True
+            self._first_change = now
+        self._last_change = now
+        # 事件中的值可能经过 mapping 映射,保存的是编码器的原始数值
+        self._value = self._rotary.value()
+
+    def dirty(self):
+        """是否有未写入的数值"""
+        return self._dirty
+
+    def service(self):
+        """在主循环中定期调用,到达写入条件时写入一次,返回是否写入"""
+        if not self._dirty:
+            return False
+        now = utime.ticks_ms()
+        if (utime.ticks_diff(now, self._last_change) >= self._quiet_ms or
+                utime.ticks_diff(now, self._first_change) >= self._max_ms):
+            self.flush()
+            return True
+        return False
+
+    async def run(self, period_ms=100):
+        """asyncio 任务,每 period_ms 调用一次 service()"""
+        try:
+            import asyncio
+        except ImportError:
+            import uasyncio as asyncio
+        while True:
+            self.service()
+            await asyncio.sleep_ms(period_ms)
+
+    def flush(self):
+        """立即写入当前数值"""
+        if not self._dirty:
+            return
+        self._dirty = False
+        self._seq += 1
+        buf = self._buf
+        struct.pack_into(_RECORD, buf, 0, _MAGIC, self._seq, self._value, 0)
+        buf[_RECORD_SIZE - 1] = _checksum(buf)
+        with open(self._path, 'r+b') as f:
+            f.seek((self._seq % self._slots) * _RECORD_SIZE)
+            f.write(buf)
+
+    def close(self):
+        """写入未保存的数值并停止跟踪"""
+        self.flush()
+        self._rotary.remove_listener(self._on_change)
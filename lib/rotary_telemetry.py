@@ -0,0 +1,162 @@
+# Copyright (c) 2023 GeekerBear
+# Compact binary telemetry for streaming encoder events off-board
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+把一个或多个编码器的事件打包成二进制帧写入任意流对象(UART、socket、文件)。
+缓冲区记录满或距第一条记录超过 flush_ms 时发送一帧。
+两个缓冲区轮流使用:一个在组帧、发送时,新记录写入另一个,发送期间另一个也写满时
+新记录被丢弃并计入 dropped。非阻塞的流一次只写入部分字节时,剩余部分由下一次
+service()/flush() 继续发送
+
+    uart = UART(1, 115200)
+    telemetry = RotaryTelemetry(uart)
+    telemetry.attach(rotary1)
+    telemetry.attach(rotary2)
+    asyncio.create_task(telemetry.run())
+
+帧格式: 0xAA 0x55, 记录数 (B), 记录 * N, 校验 (记录数与记录各字节之和 & 0xFF)
+记录格式 '<BhiIB': rotary_id, delta, value, ticks_us, 按钮标志。
+value 为事件发生时未经 mapping 映射的原始值,ticks_us 为中断中记录事件的时间
+rotary_id 必须在 0-255 之间;delta 超出 int16 范围时截断到 -32768..32767
+按钮标志: bit0 按钮电平 (1 为释放), bit7 本条记录为按钮事件
+
+主机端用 host/rotary_decoder.py 中的 FrameDecoder 解码,该模块不依赖开发板的模块
+"""
+
+import struct
+import utime
+from micropython import const
+
+_SYNC = b'\xaa\x55'
+_RECORD = '<BhiIB'
+_RECORD_SIZE = const(12)
+_HEADER_SIZE = const(3)
+BUTTON_LEVEL = const(0x01)
+BUTTON_EVENT = const(0x80)
+
+
+class RotaryTelemetry(object):
+
+    def __init__(self, stream, max_records=16, flush_ms=50):
+        self._stream = stream
+        self._max_records = max_records
+        self._flush_ms = flush_ms
+        size = _HEADER_SIZE + max_records * _RECORD_SIZE + 1
+        self._bufs = (bytearray(size), bytearray(size))
+        for buf in self._bufs:
+            buf[0:2] = _SYNC
+        self._counts = [0, 0]
+        self._active = 0  # 正在写入记录的缓冲区
+        self._sending = -1  # 正在发送的缓冲区,-1 为没有
+        self._sent = 0
+        self._end = 0
+        self._flushing = False
+        self._first = 0
+        self.dropped = 0
+        self._rotary = []
+
+    def attach(self, rotary):
+        """开始转发该编码器的转动和按钮事件"""
+        if not 0 <= rotary._rotary_id <= 0xFF:
+            raise ValueError('rotary_id %d does not fit the telemetry record' % rotary._rotary_id)
+        # 事件监听器收到的是中断中记录的原始值和时间,事件排队期间编码器继续转动也不影响记录
+        level = [rotary._value, rotary._btn_value]  # 最近的数值和按钮电平
+
+        def on_event(rotary_id, kind, value, delta, t, seq):
+            if kind == rotary.EVENT_CHANGE:
+                level[0] = value
+                self._add(rotary_id, delta, value, level[1], t)
+            elif kind == rotary.EVENT_BUTTON:
+                level[1] = value
+                self._add(rotary_id, 0, level[0], value | BUTTON_EVENT, t)
+
+        rotary.add_event_listener(on_event)
+        self._rotary.append((rotary, on_event))
+
+    def detach(self, rotary):
+        """停止转发该编码器的事件"""
+        for entry in self._rotary:
+            if entry[0] is rotary:
+                rotary.remove_event_listener(entry[1])
+                self._rotary.remove(entry)
+                return
+        raise ValueError('{} is not attached'.format(rotary))
+
+    def _add(self, rotary_id, delta, value, button, t):
+        # 加速或大步长时 delta 可能超出 int16,截断而不是让 pack_into 出错丢掉记录
+        if delta > 0x7FFF:
+            delta = 0x7FFF
+        elif delta < -0x8000:
+            delta = -0x8000
+        i = self._active
+        count = self._counts[i]
+        if count == self._max_records:
+            # 另一个缓冲区还在发送
+            self.dropped += 1
+            return
+        if count == 0:
+            self._first = utime.ticks_ms()
+        struct.pack_into(_RECORD, self._bufs[i], _HEADER_SIZE + count * _RECORD_SIZE,
+                         rotary_id, delta, value, t, button)
+        self._counts[i] = count + 1
+        if count + 1 == self._max_records:
+            self.flush()
+
+    def service(self):
+        """在主循环中定期调用,缓冲区中的记录超过 flush_ms 时发送,并继续未写完的帧"""
+        if self._sending >= 0 or (self._counts[self._active] and
+                                  utime.ticks_diff(utime.ticks_ms(), self._first) >= self._flush_ms):
+            self.flush()
+
+    async def run(self, period_ms=10):
+        """asyncio 任务,每 period_ms 调用一次 service()"""
+        try:
+            import asyncio
+        except ImportError:
+            import uasyncio as asyncio
+        while True:
+            self.service()
+            await asyncio.sleep_ms(period_ms)
+
+    def flush(self):
+        """立即发送缓冲区中的记录。流暂时写不进时保留剩余部分,返回是否已全部发送"""
+        # 监听器由 micropython.schedule 调用,可能在本函数的两条字节码之间运行并再次调用 flush()
+        if self._flushing:
+            return False
+        self._flushing = True
+        try:
+            if self._sending >= 0 and not self._send():
+                return False
+            i = self._active
+            if not self._counts[i]:
+                return True
+            # 切换之后新记录写入另一个缓冲区;切换前写入的记录已计入 _counts[i]
+            self._active = i ^ 1
+            count = self._counts[i]
+            buf = self._bufs[i]
+            end = _HEADER_SIZE + count * _RECORD_SIZE
+            buf[2] = count
+            check = 0
+            for k in range(2, end):
+                check += buf[k]
+            buf[end] = check & 0xFF
+            self._sending = i
+            self._sent = 0
+            self._end = end + 1
+            return self._send()
+        finally:
+            self._flushing = False
+
+    def _send(self):
+        buf = memoryview(self._bufs[self._sending])
+        while self._sent < self._end:
+            n = self._stream.write(buf[self._sent:self._end])
+            if not n:
+                # 非阻塞的流返回 None 或 0,下次 service()/flush() 继续
+                return False
+            self._sent += n
+        self._counts[self._sending] = 0
+        self._sending = -1
+        return True
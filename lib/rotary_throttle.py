@@ -0,0 +1,79 @@
+# Copyright (c) 2023 GeekerBear
+# Per-listener rate limiting with trailing-edge delivery
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+限制数值改变监听器的调用频率,由 add_listener(l, max_hz=...) 或 @rotary.change(max_hz=...) 创建
+
+    @rotary.change(max_hz=30)
+    def redraw(rotary_id, value, delta):
+        ...
+
+每秒最多调用 max_hz 次,两次调用之间的步数累加到 delta 中。转动停止后,
+最后一个值总会在周期结束时送达(trailing edge),该次调用通过 rotary_timer 定时、
+由 micropython.schedule 在中断外执行
+"""
+
+import machine
+import micropython
+import utime
+import rotary_timer
+
+
+class Throttle(object):
+
+    def __init__(self, listener, max_hz):
+        if max_hz <= 0:
+            raise ValueError('max_hz must be positive')
+        self.listener = listener
+        self._period = max(1, 1000 // max_hz)
+        self._last = utime.ticks_add(utime.ticks_ms(), -self._period)
+        self._rotary_id = 0
+        self._value = 0
+        self._delta = 0
+        self._dirty = False
+        self._armed = False
+        self._deliver_ref = self._deliver
+        self._slot = rotary_timer.register(self._timer)
+
+    def __call__(self, rotary_id, value, delta):
+        self._rotary_id = rotary_id
+        self._value = value
+        self._delta += delta
+        self._dirty = True
+        wait = self._period - utime.ticks_diff(utime.ticks_ms(), self._last)
+        if wait <= 0:
+            self._deliver(None)
+        elif not self._armed:
+            self._armed = True
+            rotary_timer.arm(self._slot, wait)
+
+    def _timer(self, t):
+        # 定时器回调可能运行在硬中断中,监听器交给 micropython.schedule 调用
+        try:
+            micropython.schedule(self._deliver_ref, None)
+        except RuntimeError:
+            rotary_timer.arm(self._slot, 1)
+
+    def _deliver(self, _):
+        state = machine.disable_irq()
+        self._armed = False
+        if not self._dirty:
+            machine.enable_irq(state)
+            return
+        self._dirty = False
+        self._last = utime.ticks_ms()
+        rotary_id = self._rotary_id
+        value = self._value
+        delta = self._delta
+        self._delta = 0
+        machine.enable_irq(state)
+        self.listener(rotary_id, value, delta)
+
+    def close(self):
+        """取消未送达的调用并释放定时器槽位,可重复调用"""
+        # 槽位释放后可能已分配给其他使用者,不能再次释放
+        if self._slot is not None:
+            rotary_timer.unregister(self._slot)
+            self._slot = None
@@ -0,0 +1,178 @@
+# Copyright (c) 2023 GeekerBear
+# Shared one-shot timer scheduler for all encoders
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+所有编码器的按钮计时和延迟任务共用一个硬件定时器。每个使用者注册一个槽位,
+定时器只在最近的截止时间唤醒一次,没有待处理的任务时不唤醒
+
+    import rotary_timer
+    rotary_timer.configure(timer_id=2)   # 可选,须在创建编码器之前调用
+
+    slot = rotary_timer.register(callback)   # callback(timer)
+    rotary_timer.arm(slot, 250)              # 250ms 后调用一次,不在硬中断中时传 hard=False
+    rotary_timer.cancel(slot)
+    rotary_timer.unregister(slot)
+
+轮询采样需要各自的周期定时器,由 claim()/release() 分配,
+保证两个编码器不会占用同一个硬件定时器
+"""
+
+import machine
+import micropython
+import utime
+from array import array
+from machine import Timer
+from sys import platform
+
+# ESP32 不支持虚拟定时器,默认使用硬件定时器 1,其余硬件定时器留给编码器的轮询采样
+_timer_id = 1 if platform == 'esp32' else -1
+_HW_TIMERS = (0, 1, 2, 3) if platform == 'esp32' else ()
+_claimed = []  # 轮询采样已占用的硬件定时器 id
+_timer = None
+_pending = False  # 已通过 micropython.schedule 请求重新设置硬件定时器
+_retry = False  # 调度队列已满,重新设置留给 service()
+_callback = []
+_deadline = array('i')
+_armed = bytearray()
+_next = None  # 硬件定时器当前的截止时间
+
+
+def configure(timer_id):
+    """指定使用的硬件定时器 id,须在第一次 register() 之前调用"""
+    global _timer_id
+    if _timer is not None:
+        raise ValueError('rotary_timer is already running on timer %d' % _timer_id)
+    if timer_id >= 0 and timer_id in _claimed:
+        raise ValueError('timer %d is already used for polling' % timer_id)
+    _timer_id = timer_id
+
+
+def claim(timer_id=None):
+    """
+    创建轮询采样用的周期定时器,返回 (timer_id, Timer)。timer_id 为 None 时自动选择:
+    ESP32 取第一个空闲的硬件定时器,其他端口用虚拟定时器 -1。
+    硬件定时器已被其他编码器或共享定时器占用时抛出 ValueError
+    """
+    if timer_id is None:
+        timer_id = -1
+        for i in _HW_TIMERS:
+            if i != _timer_id and i not in _claimed:
+                timer_id = i
+                break
+        else:
+            if _HW_TIMERS:
+                raise ValueError('no free hardware timer for polling')
+    if timer_id >= 0:
+        if timer_id == _timer_id:
+            raise ValueError('timer %d is used by rotary_timer' % timer_id)
+        if timer_id in _claimed:
+            raise ValueError('timer %d is already used by another encoder' % timer_id)
+        _claimed.append(timer_id)
+    return timer_id, Timer(timer_id)
+
+
+def release(timer_id):
+    """释放 claim() 分配的定时器 id"""
+    if timer_id in _claimed:
+        _claimed.remove(timer_id)
+
+
+def register(callback):
+    """注册一个槽位,返回槽位号。分配内存,不要在中断中调用"""
+    global _timer
+    if _timer is None:
+        _timer = Timer(_timer_id)
+    for slot in range(len(_callback)):
+        if _callback[slot] is None:
+            _callback[slot] = callback
+            return slot
+    _callback.append(callback)
+    _deadline.append(0)
+    _armed.append(0)
+    return len(_callback) - 1
+
+
+def unregister(slot):
+    """取消并释放槽位"""
+    cancel(slot)
+    _callback[slot] = None
+
+
+def arm(slot, ms, hard=True):
+    """
+    ms 毫秒后调用该槽位的回调一次,已有的截止时间被替换。可在中断(包括硬中断)中调用:
+    Timer.init() 在 ESP32 上会重新注册定时器中断,不能在硬中断中执行,
+    需要提前唤醒时重新设置硬件定时器的工作交给 micropython.schedule。
+    调用者确定不在硬中断中时传 hard=False,直接重新设置
+    """
+    state = machine.disable_irq()
+    _deadline[slot] = utime.ticks_add(utime.ticks_ms(), ms)
+    _armed[slot] = 1
+    earlier = _next is None or utime.ticks_diff(_deadline[slot], _next) < 0
+    machine.enable_irq(state)
+    if earlier:
+        if hard:
+            _request()
+        else:
+            _reprogram(None)
+
+
+def cancel(slot):
+    """取消该槽位的截止时间。硬件定时器在下次唤醒时重新选择最近的截止时间"""
+    _armed[slot] = 0
+
+
+def service():
+    """在中断外调用(如事件队列分发时),补上因调度队列已满而没有完成的重新设置"""
+    global _retry
+    if _retry:
+        _retry = False
+        _reprogram(None)
+
+
+def _request():
+    global _pending, _retry
+    if _pending:
+        return
+    _pending = True
+    try:
+        micropython.schedule(_reprogram, None)
+    except RuntimeError:
+        # 调度队列已满,截止时间保留,由 service()、下一次 arm() 或定时器唤醒时重新设置
+        _pending = False
+        _retry = True
+
+
+def _reprogram(_):
+    """按所有槽位中最近的截止时间启动硬件定时器,在中断外或定时器回调中调用"""
+    global _pending, _retry, _next
+    state = machine.disable_irq()
+    _pending = False
+    _retry = False
+    nearest = None
+    for slot in range(len(_callback)):
+        if _armed[slot] and (nearest is None or utime.ticks_diff(_deadline[slot], nearest) < 0):
+            nearest = _deadline[slot]
+    start = nearest is not None and nearest != _next
+    if start:
+        _next = nearest
+    machine.enable_irq(state)
+    if start:
+        ms = utime.ticks_diff(nearest, utime.ticks_ms())
+        _timer.init(period=ms if ms > 0 else 1, mode=Timer.ONE_SHOT, callback=_fire)
+
+
+def _fire(t):
+    global _next
+    _next = None
+    now = utime.ticks_ms()
+    for slot in range(len(_callback)):
+        if _armed[slot] and utime.ticks_diff(_deadline[slot], now) <= 0:
+            _armed[slot] = 0
+            _callback[slot](t)
+
+    # 回调中可能已经重新 arm,仍按所有槽位中最近的截止时间启动定时器。
+    # 在定时器自己的回调中重新设置该定时器是允许的
+    _reprogram(None)
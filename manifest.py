@@ -0,0 +1,30 @@
+# Copyright (c) 2023 GeekerBear
+# Freeze the rotary encoder modules into MicroPython firmware
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+# 在 MicroPython 源码的 ports/<port> 目录下编译固件:
+#   make BOARD=<board> FROZEN_MANIFEST=/path/to/micropython-rotary/manifest.py
+# 冻结后模块的字节码和 bytes 状态表直接从 flash 执行,import 时不编译、不占用 RAM
+
+include("$(PORT_DIR)/boards/manifest.py")
+
+# 核心与引脚中断实现
+module("rotary.py", base_path="lib")
+module("rotary_kernel.py", base_path="lib")
+module("rotary_irq.py", base_path="lib")
+module("rotary_timer.py", base_path="lib")
+module("rotary_button.py", base_path="lib")
+
+# 旧的导入路径
+module("rotary_irq_esp.py", base_path="lib")
+module("rotary_irq_rp2.py", base_path="lib")
+module("rotary_irq_pyb.py", base_path="lib")
+
+# 可选功能,不需要时可以删掉对应的行
+module("rotary_poll.py", base_path="lib")
+module("rotary_bank.py", base_path="lib")
+module("rotary_throttle.py", base_path="lib")
+module("rotary_store.py", base_path="lib")
+module("rotary_telemetry.py", base_path="lib")
+module("rotary_map.py", base_path="lib")
@@ -0,0 +1,36 @@
+# Copyright (c) 2023 GeekerBear
+# pytest configuration for the host-side tests
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+在 CPython 上用 host/ 下的桩模块和 SimRotary 运行测试,无需硬件。在仓库根目录运行:
+    python3 -m pytest tests
+"""
+
+import os
+import sys
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(_ROOT, 'lib'))
+sys.path.insert(0, os.path.join(_ROOT, 'host'))
+
+import pytest
+import machine
+import utime
+
+
+@pytest.fixture(autouse=True)
+def virtual_clock():
+    """每个测试从虚拟时钟 0 开始,结束后停止所有定时器并恢复真实时钟"""
+    utime.set_ticks_us(0)
+    yield
+    machine._reset()
+    rotary_timer = sys.modules.get('rotary_timer')
+    if rotary_timer is not None:
+        # 共享定时器的状态属于上一个测试的时间轴
+        rotary_timer._next = None
+        rotary_timer._retry = False
+        for slot in range(len(rotary_timer._armed)):
+            rotary_timer._armed[slot] = 0
+    utime.set_ticks_us(None)
@@ -0,0 +1,89 @@
+# Copyright (c) 2023 GeekerBear
+# Heap allocations per edge on the hard IRQ path
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+hard=True 时边沿处理不能分配堆内存。CPython 的整数本身在堆上分配,无法要求 0 字节,
+因此用 tracemalloc 统计每个边沿处理期间的分配峰值(包括处理结束前已释放的临时对象),
+只允许几个临时整数对象的余量;列表、dir(self) 之类的分配会超出余量。
+MicroPython 上的精确统计(字节/边沿)见 bench_rotary.py
+"""
+
+import gc
+import tracemalloc
+
+import pytest
+from rotary_sim import SimRotary, Quadrature
+
+_EDGES = 4000
+# CPython: 每个边沿处理中同时存在的临时整数(时间戳、数值等,每个 32 字节)
+_CPYTHON_SLACK = 192
+
+_CONFIGS = (
+    {},
+    {'event_queue': 0},
+    {'range_mode': SimRotary.RANGE_WRAP, 'max_val': 20},
+    {'range_mode': SimRotary.RANGE_BOUNDED, 'max_val': 20},
+    {'half_step': True},
+    {'quarter_step': True},
+    {'accel': ((5000, 4), (20000, 2))},
+    {'resync': True, 'glitch_us': 10},
+    {'capture': 64},
+)
+
+
+def _edges(count):
+    # 来回旋转,有界模式也会经过边界
+    q = Quadrature()
+    edges = []
+    while len(edges) < count:
+        edges.extend((clk, dt) for _, clk, dt in q.turn(25, rate_hz=500))
+        edges.extend((clk, dt) for _, clk, dt in q.turn(-25, rate_hz=500))
+    return edges[:count]
+
+
+def _run(r, edges):
+    edge = r.edge
+    for clk, dt in edges:
+        edge(clk, dt)
+
+
+def _peak_per_edge(r, edges):
+    """逐个送入边沿,返回单个边沿处理期间分配的最大字节数"""
+    _run(r, edges)  # 预热:第一次执行时创建的对象不计入
+    gc.collect()
+    tracemalloc.start()
+    worst = 0
+    for clk, dt in edges:
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        r.edge(clk, dt)
+        worst = max(worst, tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    return worst
+
+
+def _assert_no_allocation(r, edges):
+    peak = _peak_per_edge(r, edges)
+    assert peak <= _CPYTHON_SLACK, '%d bytes allocated in one edge' % peak
+
+
+@pytest.mark.parametrize('kwargs', _CONFIGS, ids=lambda kwargs: ','.join(sorted(kwargs)) or 'default')
+def test_no_allocation_per_edge(kwargs):
+    edges = _edges(_EDGES)
+    r = SimRotary(**kwargs)
+    _assert_no_allocation(r, edges)
+
+
+def test_no_allocation_with_stats():
+    edges = _edges(_EDGES)
+    r = SimRotary(stats=True)
+    _assert_no_allocation(r, edges)
+    assert r.stats()['edges'] == 2 * _EDGES
+
+
+def test_edges_are_counted():
+    r = SimRotary(event_queue=0)
+    _run(r, [(clk, dt) for _, clk, dt in Quadrature().turn(10)])
+    assert r.value() == 10
@@ -0,0 +1,108 @@
+# Copyright (c) 2023 GeekerBear
+# Raw edge capture and host-side replay
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+采样在抖动过滤之前记录,回放同一份记录可以比较不同的 glitch_us;
+环形缓冲区覆盖旧记录后,回放从文件头中的起始电平开始
+"""
+
+import struct
+
+from rotary_sim import SimRotary, Quadrature, load_capture, replay_capture
+
+
+def _bounced(detents):
+    # 每个边沿后附加两次 5us 的抖动
+    return list(Quadrature(t_us=1000).turn(detents, rate_hz=200, bounce=2, bounce_us=5))
+
+
+def test_capture_keeps_filtered_edges():
+    edges = _bounced(10)
+    r = SimRotary(capture=256, glitch_us=20)
+    r.feed(edges)
+    assert r.stats()['glitches'] > 0
+    assert r._cap_count == len(edges)
+
+
+def test_replay_compares_glitch_settings(tmp_path):
+    path = str(tmp_path / 'trace.bin')
+    edges = _bounced(10)
+    r = SimRotary(capture=256, glitch_us=20)
+    r.feed(edges)
+    assert r.dump_capture(path) == len(edges)
+
+    half_step, invert, quarter_step, start, records = load_capture(path)
+    assert (half_step, invert, quarter_step) == (False, False, False)
+    assert start == 0x07  # 静止,按钮释放
+    assert [t for t, _ in records] == [t for t, _, _ in edges]
+
+    filtered = replay_capture(path, glitch_us=20)
+    assert filtered.value() == r.value() == 10
+    assert filtered.stats()['glitches'] == r.stats()['glitches']
+    unfiltered = replay_capture(path)
+    assert unfiltered.stats()['glitches'] == 0
+
+
+def test_replay_starts_from_overwritten_level(tmp_path):
+    path = str(tmp_path / 'trace.bin')
+    edges = list(Quadrature(t_us=1000, quarter_step=True).turn(8))
+    r = SimRotary(capture=6, quarter_step=True)
+    r.feed(edges)
+    assert r.value() == 8
+    assert r.dump_capture(path) == 6
+
+    _, _, quarter_step, start, records = load_capture(path)
+    assert quarter_step
+    # 起始电平是最后一条被覆盖的采样:第 2 个边沿之后的电平
+    assert start == (edges[1][1] << 1 | edges[1][2] | 0x04)
+    assert replay_capture(path).value() == 6
+
+
+def test_load_version_1_capture(tmp_path):
+    path = str(tmp_path / 'v1.bin')
+    edges = list(Quadrature(t_us=1000).turn(2))
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<4sBBI', b'RTRC', 1, 0, len(edges)))
+        for t, clk, dt in edges:
+            f.write(struct.pack('<IB', t, clk << 1 | dt | 0x04))
+    _, _, _, start, records = load_capture(path)
+    assert start == 0x07
+    assert len(records) == len(edges)
+    assert replay_capture(path).value() == 2
+
+
+def test_capture_button_edges():
+    r = SimRotary(capture=16, btn_glitch_us=1000)
+    r.run_until(5000)
+    r.button(SimRotary.BUTTON_PRESS)
+    r.button(SimRotary.BUTTON_RELEASE)  # 时钟未推进,被过滤
+    assert r._cap_count == 2
+    assert r.stats()['glitches'] == 1
+    assert r._btn_value == SimRotary.BUTTON_PRESS
+
+
+class _CountingReads(SimRotary):
+    reads = 0
+
+    def _hal_get_clk_value(self):
+        self.reads += 1
+        return self._clk
+
+    def _hal_get_btn_value(self):
+        self.reads += 1
+        return self._btn
+
+
+def test_rejected_bounce_skips_pin_reads():
+    # 未启用采样记录时,抖动过滤在读取引脚之前完成
+    r = _CountingReads(glitch_us=1000, btn_glitch_us=1000)
+    r.run_until(5000)
+    r.edge(1, 0)
+    r.button(SimRotary.BUTTON_PRESS)
+    reads = r.reads
+    r.edge(1, 1)
+    r.button(SimRotary.BUTTON_RELEASE)
+    assert r.stats()['glitches'] == 2
+    assert r.reads == reads
@@ -0,0 +1,56 @@
+# Copyright (c) 2023 GeekerBear
+# Quarter-step (x4) decoding
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+四倍频模式对同一段波形每个格雷码边沿计数一次,计数应为全步的 4 倍,
+方向与全步一致;分别检查顺/逆时针、invert、三种范围模式和 set(quarter_step=True)
+"""
+
+import pytest
+from rotary_sim import SimRotary, Quadrature
+
+_DETENTS = 10
+_RANGES = (SimRotary.RANGE_UNBOUNDED, SimRotary.RANGE_WRAP, SimRotary.RANGE_BOUNDED)
+
+
+def _rotary(**kwargs):
+    # 从范围中间开始,两个方向都不碰到边界
+    r = SimRotary(min_val=-100, max_val=100, **kwargs)
+    r.set(value=0)
+    return r
+
+
+def _spin(r, detents, invert=False):
+    # 波形总是按全步编码器生成,两种解码模式看到的是同样的边沿
+    r.feed(Quadrature(invert=invert, t_us=1000).turn(detents))
+    return r.value()
+
+
+@pytest.mark.parametrize('range_mode', _RANGES, ids=('unbounded', 'wrap', 'bounded'))
+@pytest.mark.parametrize('invert', (False, True), ids=('normal', 'invert'))
+@pytest.mark.parametrize('detents', (_DETENTS, -_DETENTS), ids=('cw', 'ccw'))
+def test_quarter_counts_four_times_full(detents, invert, range_mode):
+    full = _spin(_rotary(range_mode=range_mode, invert=invert), detents, invert)
+    quarter = _spin(_rotary(range_mode=range_mode, invert=invert, quarter_step=True), detents, invert)
+    assert full == detents
+    assert quarter == 4 * full
+
+
+@pytest.mark.parametrize('detents', (_DETENTS, -_DETENTS), ids=('cw', 'ccw'))
+def test_set_switches_to_quarter_step(detents):
+    r = _rotary()
+    assert _spin(r, detents) == detents
+    r.set(value=0, quarter_step=True)
+    assert _spin(r, detents) == 4 * detents
+    r.set(value=0, quarter_step=False)
+    assert _spin(r, detents) == detents
+
+
+def test_quarter_step_respects_range_limits():
+    # 4 倍计数同样受范围约束:有界模式停在上限,包裹模式回绕
+    bounded = SimRotary(max_val=10, range_mode=SimRotary.RANGE_BOUNDED, quarter_step=True)
+    assert _spin(bounded, 5) == 10
+    wrap = SimRotary(max_val=9, range_mode=SimRotary.RANGE_WRAP, quarter_step=True)
+    assert _spin(wrap, 3) == 2
@@ -0,0 +1,68 @@
+# Copyright (c) 2023 GeekerBear
+# Missed-edge detection and resync
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+用 Quadrature(drop=N) 模拟中断来不及处理而漏掉的边沿,在逐步提高的转速下
+比较 resync 开启前后的计数。虚拟时钟使结果与主机速度无关
+"""
+
+import pytest
+from rotary_sim import SimRotary, Quadrature
+
+_RATES = (100, 1000, 5000, 20000)
+_DETENTS = 100
+
+
+def _spin(detents, rate_hz, drop, half_step=False, resync=True, **kwargs):
+    r = SimRotary(half_step=half_step, resync=resync, **kwargs)
+    r.feed(Quadrature(half_step=half_step, t_us=1000).turn(detents, rate_hz=rate_hz, drop=drop))
+    return r
+
+
+@pytest.mark.parametrize('half_step', (False, True), ids=('full', 'half'))
+@pytest.mark.parametrize('rate_hz', _RATES)
+def test_resync_recovers_dropped_edges(half_step, rate_hz):
+    # 不丢边沿时的计数作为基准(半步状态表的方向与全步相反)
+    expected = _spin(_DETENTS, rate_hz, 0, half_step, resync=False).value()
+    assert abs(expected) == _DETENTS
+
+    lost = _spin(_DETENTS, rate_hz, 3, half_step, resync=False)
+    assert abs(lost.value()) < _DETENTS // 2
+
+    r = _spin(_DETENTS, rate_hz, 3, half_step)
+    assert r.value() == expected
+    stats = r.stats()
+    assert stats['resyncs'] > 0
+    assert stats['resync_missed'] <= 1
+
+
+@pytest.mark.parametrize('rate_hz', _RATES)
+def test_resync_counter_clockwise(rate_hz):
+    r = _spin(-_DETENTS, rate_hz, 3)
+    assert r.value() == -_DETENTS
+
+
+@pytest.mark.parametrize('rate_hz', _RATES)
+def test_resync_is_deterministic(rate_hz):
+    # 101 个定位点的最后一个边沿不会被丢掉;丢掉的末尾边沿之后没有边沿,无法检测
+    first = _spin(101, rate_hz, 5)
+    second = _spin(101, rate_hz, 5)
+    assert first.value() == second.value() == 101
+    assert first.stats() == second.stats()
+    assert first.stats()['resync_missed'] == 0
+
+
+def test_no_drops_no_resyncs():
+    r = _spin(_DETENTS, 20000, 0)
+    assert r.value() == _DETENTS
+    assert r.stats()['resyncs'] == 0
+
+
+def test_jump_without_direction_is_only_counted():
+    # 静止状态下 CLK/DT 同时跳变,没有方向可参考
+    r = SimRotary(resync=True)
+    r.edge(0, 0)
+    assert r.value() == 0
+    assert r.stats()['resync_missed'] == 1
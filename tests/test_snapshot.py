@@ -0,0 +1,43 @@
+# Copyright (c) 2023 GeekerBear
+# snapshot() and take_delta() for polling consumers
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+轮询的主循环用 take_delta() 批量处理转动,有界模式下累计的 delta 不能越过边界
+"""
+
+from rotary_sim import SimRotary, Quadrature
+
+
+def test_bounded_delta_stops_at_bound():
+    r = SimRotary(max_val=10, incr=4, range_mode=SimRotary.RANGE_BOUNDED)
+    deltas = []
+    r.add_listener(lambda rotary_id, value, delta: deltas.append(delta))
+    q = Quadrature(t_us=1000)
+    r.feed(q.turn(5))
+    assert r.value() == 10
+    assert deltas == [4, 4, 2]
+    assert r.take_delta() == 10
+    assert r.take_delta() == 0
+
+    r.feed(q.turn(-5))
+    assert r.value() == 0
+    assert r.take_delta() == -10
+
+
+def test_wrap_delta_counts_steps():
+    r = SimRotary(max_val=9, incr=3, range_mode=SimRotary.RANGE_WRAP)
+    r.feed(Quadrature(t_us=1000).turn(4))
+    assert r.value() == 2
+    assert r.take_delta() == 12
+
+
+def test_snapshot_sequence():
+    r = SimRotary()
+    value, direction, seq, _ = r.snapshot()
+    assert (value, seq) == (0, 0)
+    r.feed(Quadrature(t_us=1000).turn(3))
+    value, direction, seq, t = r.snapshot()
+    assert (value, direction, seq) == (3, 1, 3)
+    assert t > 0
@@ -0,0 +1,56 @@
+# Copyright (c) 2023 GeekerBear
+# stats() counters stay in the small-int range
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+统计计数器保存在 array('I') 中,超过 0x3fffffff 的值在 MicroPython 上读出时会分配长整数,
+硬中断中会抛出 MemoryError。计数器必须停在上限以内,平均耗时不受影响
+"""
+
+import rotary
+from rotary_sim import SimRotary, Quadrature
+
+_LIMIT = 0x3fffffff
+
+
+def _turn(r, detents):
+    r.feed(Quadrature(t_us=1000).turn(detents, rate_hz=100))
+
+
+def test_counters_saturate():
+    r = SimRotary(stats=True)
+    st = r._stats
+    for i in (rotary._ST_EDGES, rotary._ST_DETENTS):
+        st[i] = _LIMIT - 1
+    for i in range(rotary._ST_HIST_BINS):
+        st[rotary._ST_HIST + i] = _LIMIT
+    _turn(r, 5)
+    stats = r.stats()
+    assert stats['edges'] == _LIMIT
+    assert stats['detents'] == _LIMIT
+    assert max(stats['isr_hist']) == _LIMIT
+    assert max(st) <= _LIMIT
+
+
+def test_isr_sum_keeps_mean():
+    r = SimRotary(stats=True)
+    st = r._stats
+    st[rotary._ST_ISR_COUNT] = 1000
+    st[rotary._ST_ISR_SUM] = _LIMIT - 10
+    mean = st[rotary._ST_ISR_SUM] // st[rotary._ST_ISR_COUNT]
+    # 虚拟时钟在一次中断内不走,直接记录耗时
+    for _ in range(100):
+        r._record_isr_time(st, mean)
+    assert st[rotary._ST_ISR_SUM] <= _LIMIT
+    assert st[rotary._ST_ISR_COUNT] < 1000
+    assert abs(r.stats()['isr_mean_us'] - mean) <= 1
+
+
+def test_reset_stats():
+    r = SimRotary(stats=True)
+    _turn(r, 3)
+    r.reset_stats()
+    stats = r.stats()
+    assert stats['edges'] == 0
+    assert stats['isr_min_us'] == 0
@@ -0,0 +1,130 @@
+# Copyright (c) 2023 GeekerBear
+# Write-coalescing persistent position store
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+RotaryStore 写入临时文件:连续转动只写一次,重启后恢复,槽位轮流写入,损坏的记录被跳过
+"""
+
+import os
+import pytest
+import utime
+from rotary_sim import SimRotary, Quadrature
+from rotary_store import RotaryStore, _RECORD_SIZE
+
+
+class _CountingStore(RotaryStore):
+    """统计 flush() 实际写入的次数"""
+    writes = 0
+
+    def flush(self):
+        if self._dirty:
+            self.writes += 1
+        super().flush()
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'rotary.dat')
+
+
+def _turn(r, q, detents):
+    r.feed(q.turn(detents, rate_hz=50))
+
+
+def test_creates_file_with_all_slots(path):
+    RotaryStore(SimRotary(), path, slots=4)
+    assert os.path.getsize(path) == 4 * _RECORD_SIZE
+
+
+def test_coalesces_writes_until_quiet(path):
+    r = SimRotary()
+    store = _CountingStore(r, path, quiet_ms=1000, max_ms=10000)
+    q = Quadrature(t_us=1000)
+    for _ in range(20):
+        _turn(r, q, 1)
+        assert not store.service()
+    assert store.dirty()
+
+    utime.set_ticks_us(q.t_us + 999000)
+    assert not store.service()
+    utime.set_ticks_us(q.t_us + 1000000)
+    assert store.service()
+    assert store.writes == 1
+    assert not store.dirty()
+
+
+def test_max_ms_forces_write_while_turning(path):
+    r = SimRotary()
+    store = _CountingStore(r, path, quiet_ms=1000, max_ms=2000)
+    q = Quadrature(t_us=1000)
+    writes = 0
+    # 每 100ms 一个定位点,连续转动 5 秒
+    for _ in range(50):
+        _turn(r, q, 1)
+        q.idle(80000)
+        utime.set_ticks_us(q.t_us)
+        writes += store.service()
+    assert writes == store.writes == 2
+
+
+def test_restores_last_value(path):
+    r = SimRotary(max_val=100, range_mode=SimRotary.RANGE_BOUNDED)
+    store = RotaryStore(r, path)
+    _turn(r, Quadrature(t_us=1000), 7)
+    store.close()
+
+    restored = SimRotary(max_val=100, range_mode=SimRotary.RANGE_BOUNDED)
+    RotaryStore(restored, path)
+    assert restored.value() == 7
+
+    not_restored = SimRotary()
+    RotaryStore(not_restored, path, restore=False)
+    assert not_restored.value() == 0
+
+
+def test_rotates_slots_and_keeps_newest(path):
+    r = SimRotary()
+    store = RotaryStore(r, path, slots=3)
+    q = Quadrature(t_us=1000)
+    for _ in range(5):
+        _turn(r, q, 1)
+        store.flush()
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert len(data) == 3 * _RECORD_SIZE
+    # 5 次写入分布在所有槽位中
+    assert all(data[i * _RECORD_SIZE] == 0xA5 for i in range(3))
+
+    restored = SimRotary()
+    RotaryStore(restored, path, slots=3)
+    assert restored.value() == 5
+
+
+def test_skips_corrupted_record(path):
+    r = SimRotary()
+    store = RotaryStore(r, path, slots=4)
+    q = Quadrature(t_us=1000)
+    _turn(r, q, 3)
+    store.flush()
+    _turn(r, q, 2)
+    store.flush()
+    # 破坏最新的记录(序号 2,槽位 2),应恢复到上一条
+    with open(path, 'r+b') as f:
+        f.seek(2 * _RECORD_SIZE + 5)
+        f.write(b'\xff')
+    restored = SimRotary()
+    RotaryStore(restored, path, slots=4)
+    assert restored.value() == 3
+
+
+def test_stores_raw_value_with_mapping(path):
+    r = SimRotary(max_val=3, range_mode=SimRotary.RANGE_BOUNDED, mapping=(10, 22, 47, 100))
+    store = RotaryStore(r, path)
+    _turn(r, Quadrature(t_us=1000), 2)
+    store.close()
+    restored = SimRotary(max_val=3, range_mode=SimRotary.RANGE_BOUNDED, mapping=(10, 22, 47, 100))
+    RotaryStore(restored, path)
+    assert restored.value() == 2
+    assert restored.mapped_value() == 47
@@ -0,0 +1,262 @@
+# Copyright (c) 2023 GeekerBear
+# Telemetry frames over a loopback socket and a pipe
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+RotaryTelemetry 写入本地 socket 对或管道,另一端用 host/rotary_decoder 解码,
+核对每条记录;另外检查分段送入、校验错误、超出字段范围的数值、部分写入,
+以及事件延迟分发时每条记录仍带有事件发生时的数值和时间
+"""
+
+import os
+import socket
+
+import pytest
+import rotary
+import utime
+from rotary_decoder import FrameDecoder, BUTTON_EVENT
+from rotary_sim import SimRotary, Quadrature
+from rotary_telemetry import RotaryTelemetry
+
+
+def _socket_pair():
+    a, b = socket.socketpair()
+    a.setblocking(False)
+    b.setblocking(False)
+
+    def read():
+        try:
+            return b.recv(65536)
+        except BlockingIOError:
+            return b''
+    return a.makefile('wb', buffering=0), read, (a, b)
+
+
+def _pipe():
+    r, w = os.pipe()
+    os.set_blocking(r, False)
+
+    def read():
+        try:
+            return os.read(r, 65536)
+        except BlockingIOError:
+            return b''
+    writer = os.fdopen(w, 'wb', buffering=0)
+    return writer, read, (writer, r)
+
+
+def _close(handles):
+    for h in handles:
+        if isinstance(h, int):
+            os.close(h)
+        else:
+            h.close()
+
+
+@pytest.fixture(params=('socket', 'pipe'))
+def loopback(request):
+    writer, read, handles = _socket_pair() if request.param == 'socket' else _pipe()
+    yield writer, read
+    _close(handles)
+
+
+def test_records_round_trip(loopback):
+    writer, read = loopback
+    telemetry = RotaryTelemetry(writer, max_records=4)
+    r1 = SimRotary(rotary_id=1)
+    r2 = SimRotary(rotary_id=2)
+    telemetry.attach(r1)
+    telemetry.attach(r2)
+
+    r1.feed(Quadrature(t_us=1000).turn(3))
+    r2.feed(Quadrature(t_us=100000).turn(-2))
+    r2.button(SimRotary.BUTTON_PRESS)
+    telemetry.flush()
+
+    records = FrameDecoder().feed(read())
+    assert [(rid, delta, value) for rid, delta, value, _, _ in records] == [
+        (1, 1, 1), (1, 1, 2), (1, 1, 3), (2, -1, -1), (2, -1, -2), (2, 0, -2)]
+    assert records[-1][4] == SimRotary.BUTTON_PRESS | BUTTON_EVENT
+    assert records[0][4] == SimRotary.BUTTON_RELEASE
+
+
+def test_full_buffer_and_flush_ms(loopback):
+    writer, read = loopback
+    telemetry = RotaryTelemetry(writer, max_records=4, flush_ms=50)
+    r = SimRotary()
+    telemetry.attach(r)
+    q = Quadrature(t_us=1000)
+
+    r.feed(q.turn(5, rate_hz=1000))
+    # 第 4 条记录写满缓冲区时立即发送
+    assert len(FrameDecoder().feed(read())) == 4
+    telemetry.service()
+    assert read() == b''
+    utime.set_ticks_us(q.t_us + 50000)
+    telemetry.service()
+    assert len(FrameDecoder().feed(read())) == 1
+
+
+def test_decoder_handles_split_and_corrupted_frames(loopback):
+    writer, read = loopback
+    telemetry = RotaryTelemetry(writer)
+    r = SimRotary()
+    telemetry.attach(r)
+    q = Quadrature(t_us=1000)
+    r.feed(q.turn(2))
+    telemetry.flush()
+    r.feed(q.turn(3))
+    telemetry.flush()
+    data = bytearray(read())
+
+    decoder = FrameDecoder()
+    records = []
+    for i in range(len(data)):
+        records.extend(decoder.feed(data[i:i + 1]))
+    assert [value for _, _, value, _, _ in records] == [1, 2, 3, 4, 5]
+
+    data[5] ^= 0xFF  # 破坏第一帧
+    decoder = FrameDecoder()
+    records = decoder.feed(b'\x00\x55' + bytes(data))
+    assert decoder.errors == 1
+    assert [value for _, _, value, _, _ in records] == [3, 4, 5]
+
+
+def test_large_delta_is_clamped(loopback):
+    writer, read = loopback
+    telemetry = RotaryTelemetry(writer)
+    r = SimRotary(incr=1000, accel=((1000000, 100),))
+    telemetry.attach(r)
+    r.feed(Quadrature(t_us=1000).turn(3))
+    telemetry.flush()
+    records = FrameDecoder().feed(read())
+    assert [delta for _, delta, _, _, _ in records] == [1000, 32767, 32767]
+    assert [value for _, _, value, _, _ in records] == [1000, 101000, 201000]
+
+
+def test_rotary_id_must_fit(loopback):
+    writer, _ = loopback
+    with pytest.raises(ValueError):
+        RotaryTelemetry(writer).attach(SimRotary(rotary_id=300))
+
+
+def test_mapping_sends_raw_value(loopback):
+    writer, read = loopback
+    telemetry = RotaryTelemetry(writer)
+    r = SimRotary(max_val=3, range_mode=SimRotary.RANGE_BOUNDED, mapping=(0.5, 1.0, 2.0, 4.0))
+    telemetry.attach(r)
+    r.feed(Quadrature(t_us=1000).turn(3))
+    telemetry.flush()
+    records = FrameDecoder().feed(read())
+    assert [value for _, _, value, _, _ in records] == [1, 2, 3]
+
+
+class _TrickleStream(object):
+    """每次最多写入 limit 字节,budget 用完后返回 None,模拟非阻塞的 UART/socket"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.budget = 0
+        self.data = bytearray()
+        self.on_write = None
+
+    def write(self, buf):
+        if self.on_write is not None:
+            hook, self.on_write = self.on_write, None
+            hook()
+        if self.budget <= 0:
+            return None
+        n = min(self.limit, self.budget, len(buf))
+        self.data += buf[:n]
+        self.budget -= n
+        return n
+
+
+def test_partial_writes_are_resumed():
+    stream = _TrickleStream(limit=5)
+    telemetry = RotaryTelemetry(stream, max_records=4)
+    r = SimRotary()
+    telemetry.attach(r)
+    q = Quadrature(t_us=1000)
+
+    r.feed(q.turn(4))
+    assert not stream.data
+    # 发送中的缓冲区写不出去时,新记录写入另一个缓冲区
+    r.feed(q.turn(3))
+    assert telemetry.dropped == 0
+    while telemetry._sending >= 0:
+        stream.budget = 7
+        telemetry.service()
+    stream.budget = 1000
+    telemetry.flush()
+    records = FrameDecoder().feed(bytes(stream.data))
+    assert [value for _, _, value, _, _ in records] == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_records_dropped_while_both_buffers_busy():
+    stream = _TrickleStream(limit=100)
+    telemetry = RotaryTelemetry(stream, max_records=2)
+    r = SimRotary()
+    telemetry.attach(r)
+    r.feed(Quadrature(t_us=1000).turn(5))
+    assert telemetry.dropped == 1
+    stream.budget = 1000
+    telemetry.flush()
+    telemetry.flush()
+    records = FrameDecoder().feed(bytes(stream.data))
+    assert [value for _, _, value, _, _ in records] == [1, 2, 3, 4]
+
+
+def test_record_added_during_flush_is_kept():
+    stream = _TrickleStream(limit=1000)
+    stream.budget = 1000
+    telemetry = RotaryTelemetry(stream, max_records=4)
+    r = SimRotary()
+    telemetry.attach(r)
+    q = Quadrature(t_us=1000)
+    r.feed(q.turn(2))
+    # 模拟 flush() 写流时被调度的监听器打断并加入新记录
+    stream.on_write = lambda: r.feed(q.turn(1))
+    telemetry.flush()
+    assert [value for _, _, value, _, _ in FrameDecoder().feed(bytes(stream.data))] == [1, 2]
+    telemetry.flush()
+    assert [value for _, _, value, _, _ in FrameDecoder().feed(bytes(stream.data))] == [1, 2, 3]
+
+
+class _Scheduler(object):
+    """记录 micropython.schedule 的回调,由测试决定何时执行"""
+
+    def __init__(self):
+        self.queue = []
+
+    def schedule(self, func, arg):
+        self.queue.append((func, arg))
+
+    def run(self):
+        queue, self.queue = self.queue, []
+        for func, arg in queue:
+            func(arg)
+
+
+def test_deferred_events_keep_their_own_value_and_time(loopback, monkeypatch):
+    writer, read = loopback
+    scheduler = _Scheduler()
+    monkeypatch.setattr(rotary, 'micropython', scheduler)
+    telemetry = RotaryTelemetry(writer)
+    r = SimRotary(max_val=3, range_mode=SimRotary.RANGE_BOUNDED, mapping=(0.5, 1.0, 2.0, 4.0))
+    telemetry.attach(r)
+
+    edges = list(Quadrature(t_us=1000).turn(3, rate_hz=100))
+    r.feed(edges)
+    r.button(SimRotary.BUTTON_PRESS)
+    # 所有事件都在排队,此时编码器已经是 3
+    assert scheduler.queue and r.value() == 3
+    scheduler.run()
+    telemetry.flush()
+    records = FrameDecoder().feed(read())
+    assert [(delta, value) for _, delta, value, _, _ in records] == [(1, 1), (1, 2), (1, 3), (0, 3)]
+    # 每个止动位的最后一个边沿是 4 的倍数
+    assert [t for _, _, _, t, _ in records[:3]] == [edges[i][0] for i in (3, 7, 11)]
+    assert [button for _, _, _, _, button in records] == [
+        SimRotary.BUTTON_RELEASE] * 3 + [SimRotary.BUTTON_PRESS | BUTTON_EVENT]
@@ -0,0 +1,96 @@
+# Copyright (c) 2023 GeekerBear
+# Per-listener rate limiting with trailing-edge delivery
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+max_hz 限速的监听器在虚拟时钟上运行:尾沿调用由 rotary_timer 使用 host/machine.py 的
+虚拟 Timer 定时,推进时钟即可触发
+"""
+
+import utime
+import rotary_timer
+from rotary_sim import SimRotary, Quadrature
+
+
+def _recorder():
+    calls = []
+
+    def listener(rotary_id, value, delta):
+        calls.append((utime.ticks_ms(), value, delta))
+    return listener, calls
+
+
+def test_rate_limit_and_trailing_edge():
+    r = SimRotary()
+    listener, calls = _recorder()
+    r.add_listener(listener, max_hz=10)
+    q = Quadrature(t_us=1000)
+    r.feed(q.turn(50, rate_hz=200))  # 250ms 内 50 个定位点
+
+    times = [t for t, _, _ in calls]
+    assert all(b - a >= 100 for a, b in zip(times, times[1:]))
+    assert calls[-1][1] < 50  # 最后的值还未送达
+
+    utime.set_ticks_us(q.t_us + 200000)
+    assert calls[-1][1] == 50
+    assert sum(delta for _, _, delta in calls) == 50
+    assert len(calls) <= 5
+    # 尾沿调用在上一次调用一个周期之后送达
+    assert calls[-1][0] - calls[-2][0] == 100
+
+
+def test_single_step_is_immediate():
+    r = SimRotary()
+    listener, calls = _recorder()
+    r.add_listener(listener, max_hz=10)
+    r.feed(Quadrature(t_us=1000).turn(1))
+    assert [(value, delta) for _, value, delta in calls] == [(1, 1)]
+    utime.set_ticks_us(1000000)
+    assert len(calls) == 1
+
+
+def test_change_decorator_with_max_hz():
+    r = SimRotary()
+    listener, calls = _recorder()
+    assert r.change(max_hz=20)(listener) is listener
+    q = Quadrature(t_us=1000)
+    r.feed(q.turn(-20, rate_hz=400))
+    utime.set_ticks_us(q.t_us + 100000)
+    assert calls[-1][1] == -20
+    assert sum(delta for _, _, delta in calls) == -20
+
+
+def test_remove_listener_releases_slot():
+    r = SimRotary()
+    listener, calls = _recorder()
+    r.add_listener(listener, max_hz=10)
+    slot = r._listener[0]._slot
+    q = Quadrature(t_us=1000)
+    r.feed(q.turn(5, rate_hz=200))
+    r.remove_listener(listener)
+    assert rotary_timer._callback[slot] is None
+    delivered = len(calls)
+    utime.set_ticks_us(q.t_us + 200000)
+    assert len(calls) == delivered
+
+
+def test_close_releases_throttle_slots():
+    r = SimRotary()
+    listener, calls = _recorder()
+    r.add_listener(listener, max_hz=10)
+    r.add_listener(lambda *args: None)
+    r.change(max_hz=10)(listener)
+    slots = (r._listener[0]._slot, r.change_callback_func._slot)
+    q = Quadrature(t_us=1000)
+    r.feed(q.turn(5, rate_hz=200))
+    r.close()
+    assert all(rotary_timer._callback[slot] is None for slot in slots)
+    delivered = len(calls)
+    utime.set_ticks_us(q.t_us + 200000)
+    assert len(calls) == delivered
+    # 释放的槽位分配给其他使用者后,再次关闭不能影响它
+    other = rotary_timer.register(lambda t: None)
+    r.close()
+    assert rotary_timer._callback[other] is not None
+    rotary_timer.unregister(other)
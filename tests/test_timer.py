@@ -0,0 +1,132 @@
+# Copyright (c) 2023 GeekerBear
+# Shared one-shot timer scheduler
+# Documentation:
+#   https://github.com/tsiiot/micropython-rotary
+
+"""
+rotary_timer 在 host/machine.py 的虚拟 Timer 上运行。arm() 可能在硬中断中调用,
+不能直接调用 Timer.init(),重新设置硬件定时器必须经过 micropython.schedule;
+调度队列已满时由 service() 补上
+"""
+
+import pytest
+import utime
+import rotary_timer
+
+
+class _Scheduler(object):
+    """记录 micropython.schedule 的回调,由测试决定何时执行"""
+
+    def __init__(self):
+        self.queue = []
+
+    def schedule(self, func, arg):
+        self.queue.append((func, arg))
+
+    def run(self):
+        queue, self.queue = self.queue, []
+        for func, arg in queue:
+            func(arg)
+
+
+@pytest.fixture
+def slots():
+    fired = []
+    registered = [rotary_timer.register(lambda t, n=n: fired.append((n, utime.ticks_ms())))
+                  for n in range(3)]
+    yield registered, fired
+    for slot in registered:
+        rotary_timer.unregister(slot)
+
+
+def test_slots_fire_at_their_deadlines(slots):
+    (a, b, c), fired = slots
+    rotary_timer.arm(a, 30)
+    rotary_timer.arm(b, 10)
+    rotary_timer.arm(c, 20)
+    rotary_timer.cancel(c)
+    utime.set_ticks_us(100000)
+    assert fired == [(1, 10), (0, 30)]
+
+
+def test_earlier_deadline_reprograms(slots):
+    (a, b, _), fired = slots
+    rotary_timer.arm(a, 50)
+    rotary_timer.arm(b, 5)
+    utime.set_ticks_us(6000)
+    assert fired == [(1, 5)]
+    utime.set_ticks_us(60000)
+    assert fired == [(1, 5), (0, 50)]
+
+
+def test_arm_defers_timer_init(slots, monkeypatch):
+    (a, _, _), fired = slots
+    scheduler = _Scheduler()
+    monkeypatch.setattr(rotary_timer, 'micropython', scheduler)
+    inits = []
+    real_init = rotary_timer._timer.init
+    monkeypatch.setattr(rotary_timer._timer, 'init', lambda **kwargs: (inits.append(kwargs), real_init(**kwargs)))
+
+    # 在"中断"中连续 arm,只请求一次重新设置,且不直接调用 Timer.init()
+    rotary_timer.arm(a, 10)
+    rotary_timer.arm(a, 10)
+    assert inits == []
+    assert len(scheduler.queue) == 1
+
+    scheduler.run()
+    assert len(inits) == 1
+    utime.set_ticks_us(20000)
+    assert fired == [(0, 10)]
+
+
+def test_claim_hardware_timers(monkeypatch):
+    monkeypatch.setattr(rotary_timer, '_HW_TIMERS', (0, 1, 2))
+    monkeypatch.setattr(rotary_timer, '_timer_id', 1)
+    monkeypatch.setattr(rotary_timer, '_claimed', [])
+    assert rotary_timer.claim()[0] == 0
+    assert rotary_timer.claim()[0] == 2
+    with pytest.raises(ValueError):
+        rotary_timer.claim()
+    with pytest.raises(ValueError):
+        rotary_timer.claim(1)
+    rotary_timer.release(0)
+    assert rotary_timer.claim()[0] == 0
+
+
+def test_claim_virtual_timer():
+    timer_id, timer = rotary_timer.claim()
+    assert timer_id == -1
+    rotary_timer.release(timer_id)
+
+
+class _FullScheduler(object):
+    """调度队列已满的 micropython.schedule"""
+
+    def schedule(self, func, arg):
+        raise RuntimeError('schedule queue full')
+
+
+def test_failed_request_is_retried_by_service(slots, monkeypatch):
+    (a, _, _), fired = slots
+    monkeypatch.setattr(rotary_timer, 'micropython', _FullScheduler())
+    rotary_timer.arm(a, 10)
+    # 调度失败时截止时间保留,硬件定时器还没有启动
+    utime.set_ticks_us(20000)
+    assert fired == []
+    # 已过期的截止时间在下一毫秒触发
+    rotary_timer.service()
+    utime.set_ticks_us(40000)
+    assert fired == [(0, 21)]
+    # 没有待补的设置时 service() 不做任何事
+    rotary_timer.service()
+    assert rotary_timer._next is None
+
+
+def test_arm_outside_hard_irq_sets_timer_directly(slots, monkeypatch):
+    (a, _, _), fired = slots
+    scheduler = _Scheduler()
+    monkeypatch.setattr(rotary_timer, 'micropython', scheduler)
+    rotary_timer.arm(a, 10, hard=False)
+    assert scheduler.queue == []
+    utime.set_ticks_us(20000)
+    assert fired == [(0, 10)]